@@ -0,0 +1,348 @@
+"""
+Benchmarks for DataSet and its readers
+
+Usage:
+    # Compare the HTML extraction engines of DataSetReaderWeb
+    python benchmarks.py html --rows 1000 10000 100000
+
+    # Time every DataSet method and both readers, saving the results as JSON
+    python benchmarks.py run --sizes 1000 100000 1000000 --output baseline.json
+
+    # Run again later and flag anything more than 10% slower than the baseline
+    python benchmarks.py run --baseline baseline.json --threshold 0.1
+
+    # Compare two saved runs
+    python benchmarks.py compare baseline.json current.json
+
+`run` exits with status 1 when a regression is found, so it can gate CI.
+Sizes go up to 100M points; the largest sizes take minutes and several GB.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from csv_reader import DataSetReaderCsv
+from dataset import DataSet, DataSetReaderWeb
+
+SUITES = ('dataset', 'csv', 'web')
+
+# 'unique': uniform floats, almost no repeats. 'duplicates': 100 distinct
+# integers, so mode() and the frequency table see heavy repetition.
+DISTRIBUTIONS = ('unique', 'duplicates')
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Values generated per batch, to bound memory while building large inputs
+GENERATE_BATCH = 1 << 16
+
+# Values per row in generated CSV files
+CSV_COLUMNS = 10
+
+# Buckets used by the window_many and histogram benchmarks
+HISTOGRAM_BINS = 1000
+
+# Timings below this are too noisy to flag as regressions
+NOISE_FLOOR = 1e-4
+
+def synthetic_html(rows, seed=0):
+    """Build a report-style page with `rows` table rows mixing numbers and text."""
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Report</title><style>td { color: red }</style></head><body><table>"]
+    for row in range(rows):
+        parts.append(f"<tr><td>Item {row}</td><td>{rng.uniform(-1000, 1000):.3f}</td>"
+                     f"<td><b>{rng.randint(0, 100)}</b></td><td>n/a</td></tr>")
+    parts.append("</table><script>var total = 0;</script></body></html>")
+    return "".join(parts)
+
+def synthetic_values(size, distribution='unique', seed=0):
+    """Return `size` values drawn from the named distribution as array('d')."""
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    rng = random.Random(seed)
+    values = array('d')
+    while len(values) < size:
+        batch = min(GENERATE_BATCH, size - len(values))
+        if distribution == 'unique':
+            values.extend(rng.uniform(-1e6, 1e6) for _ in range(batch))
+        else:
+            values.extend(float(rng.randrange(100)) for _ in range(batch))
+    return values
+
+def write_csv(path, values):
+    """Write values to path, CSV_COLUMNS per row."""
+    with open(path, 'w') as csvfile:
+        for start in range(0, len(values), GENERATE_BATCH):
+            batch = values[start:start + GENERATE_BATCH]
+            lines = (",".join(map(repr, batch[row:row + CSV_COLUMNS]))
+                     for row in range(0, len(batch), CSV_COLUMNS))
+            csvfile.write("\n".join(lines) + "\n")
+
+def time_call(function, *args, repeat=3, setup=None):
+    """Return the best wall-clock time of `repeat` calls, in seconds.
+
+    If setup is given it is called (untimed) before every call and its
+    result is passed as the only argument, so each call starts cold."""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            args = (setup(),)
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_html_engines(rows_list, repeat=3):
+    """Time every DataSetReaderWeb engine on synthetic pages of each size.
+
+    Returns:
+        list: One dict per page size with the page size in bytes and the
+        best time of each engine in seconds"""
+    results = []
+    for rows in rows_list:
+        html = synthetic_html(rows)
+        result = {'rows': rows, 'bytes': len(html.encode('utf-8'))}
+        for engine in ('soup', 'stream'):
+            reader = DataSetReaderWeb(engine=engine)
+            result[engine] = time_call(reader._extract_values, html, repeat=repeat)
+        results.append(result)
+    return results
+
+def _result(suite, name, size, distribution, seconds, **extra):
+    return dict(suite=suite, name=name, size=size, distribution=distribution,
+                seconds=seconds, **extra)
+
+def _dataset_operations(values):
+    """(name, function, setup) for every DataSet method. Each setup builds a
+    fresh dataset so lazily built indexes and tables are timed from cold."""
+    def loaded():
+        dataset = DataSet()
+        dataset.include_many(values)
+        return dataset
+
+    def include_each(dataset):
+        for value in values:
+            dataset.include(value)
+
+    low, high = min(values), max(values)
+    quarter = low + (high - low) / 4
+    edges = [low + (high - low) * i / HISTOGRAM_BINS for i in range(HISTOGRAM_BINS + 1)]
+    buckets = list(zip(edges, edges[1:]))
+    return [
+        ('include', include_each, DataSet),
+        ('include_many', lambda dataset: dataset.include_many(values), DataSet),
+        ('from_buffer', lambda _: DataSet.from_buffer(values), lambda: None),
+        ('join', lambda dataset: dataset.join(dataset), loaded),
+        ('build_index', DataSet.build_index, loaded),
+        ('sum', DataSet.sum, loaded),
+        ('mean', DataSet.mean, loaded),
+        ('median', DataSet.median, loaded),
+        ('quantile', lambda dataset: dataset.quantile(0.9), loaded),
+        ('percentile', lambda dataset: dataset.percentile(99), loaded),
+        ('mode', DataSet.mode, loaded),
+        ('min', DataSet.min, loaded),
+        ('max', DataSet.max, loaded),
+        ('range', DataSet.range, loaded),
+        ('variance', DataSet.variance, loaded),
+        ('stddev', DataSet.stddev, loaded),
+        ('window', lambda dataset: dataset.window(quarter, high - quarter), loaded),
+        ('window_many', lambda dataset: dataset.window_many(buckets), loaded),
+        ('histogram', lambda dataset: dataset.histogram(edges), loaded),
+        ('describe', DataSet.describe, loaded),
+    ]
+
+def bench_dataset(sizes, distributions=DISTRIBUTIONS, repeat=3):
+    """Time every DataSet method for each size and distribution."""
+    results = []
+    for distribution in distributions:
+        for size in sizes:
+            values = synthetic_values(size, distribution)
+            for name, function, setup in _dataset_operations(values):
+                seconds = time_call(function, repeat=repeat, setup=setup)
+                results.append(_result('dataset', name, size, distribution, seconds))
+    return results
+
+def bench_csv(sizes, distributions=DISTRIBUTIONS, repeat=3, directory=None):
+    """Time the DataSetReaderCsv parse methods on generated files of each size."""
+    reader = DataSetReaderCsv()
+    methods = ('parse', 'parse_fast', 'parse_mmap')
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as temp_dir:
+        for distribution in distributions:
+            for size in sizes:
+                path = os.path.join(temp_dir, f"{distribution}_{size}.csv")
+                write_csv(path, synthetic_values(size, distribution))
+                file_bytes = os.path.getsize(path)
+                for method in methods:
+                    seconds = time_call(getattr(reader, method), path, repeat=repeat)
+                    results.append(_result('csv', method, size, distribution, seconds,
+                                           bytes=file_bytes))
+                os.remove(path)
+    return results
+
+class _PageServer:
+    """Serves synthetic_html pages from a background thread; the path is the row count."""
+
+    def __init__(self):
+        pages = {}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                rows = int(self.path.strip('/'))
+                if rows not in pages:
+                    pages[rows] = synthetic_html(rows).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(pages[rows])))
+                self.end_headers()
+                self.wfile.write(pages[rows])
+
+            def log_message(self, *args):
+                pass
+
+        self.pages = pages
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+def bench_web(sizes, repeat=3):
+    """Time DataSetReaderWeb.parse with each engine against a local HTTP server.
+
+    A page of n rows holds 2n numbers, so rows are sized to give about
+    `size` values per page."""
+    results = []
+    with _PageServer() as server:
+        for size in sizes:
+            url = f"{server.url}/{max(1, size // 2)}"
+            for engine in ('soup', 'stream'):
+                reader = DataSetReaderWeb(engine=engine)
+                seconds = time_call(reader.parse, url, repeat=repeat)
+                results.append(_result('web', f'parse[{engine}]', size, 'page', seconds,
+                                       bytes=len(server.pages[max(1, size // 2)])))
+    return results
+
+def run_suites(suites, sizes, distributions=DISTRIBUTIONS, repeat=3):
+    """Run the named suites and return a JSON-serialisable report."""
+    results = []
+    if 'dataset' in suites:
+        results += bench_dataset(sizes, distributions, repeat)
+    if 'csv' in suites:
+        results += bench_csv(sizes, distributions, repeat)
+    if 'web' in suites:
+        results += bench_web(sizes, repeat)
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+def _key(result):
+    return (result['suite'], result['name'], result['size'], result['distribution'])
+
+def compare(baseline, current, threshold=0.1):
+    """Compare two reports from run_suites.
+
+    Returns:
+        list: One dict per benchmark present in both reports with the
+        baseline and current times, their ratio, and 'regression' set when
+        the current run is more than `threshold` slower (timings under
+        NOISE_FLOOR are never flagged)"""
+    before = {_key(result): result['seconds'] for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        key = _key(result)
+        if key not in before:
+            continue
+        old, new = before[key], result['seconds']
+        ratio = new / old if old > 0 else float('inf')
+        rows.append({
+            'suite': key[0], 'name': key[1], 'size': key[2], 'distribution': key[3],
+            'baseline': old, 'current': new, 'ratio': ratio,
+            'regression': new >= NOISE_FLOOR and ratio > 1 + threshold,
+        })
+    return rows
+
+def print_comparison(rows):
+    print(f"{'benchmark':<34} {'size':>10} {'baseline (s)':>13} {'current (s)':>12} {'ratio':>7}")
+    for row in rows:
+        name = f"{row['suite']}.{row['name']}[{row['distribution']}]"
+        flag = "  REGRESSION" if row['regression'] else ""
+        print(f"{name:<34} {row['size']:>10} {row['baseline']:>13.6f} "
+              f"{row['current']:>12.6f} {row['ratio']:>6.2f}x{flag}")
+
+def load_report(path):
+    with open(path) as report_file:
+        return json.load(report_file)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DataSet and its readers')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    html_parser = subparsers.add_parser('html', help='Compare HTML extraction engines')
+    html_parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    html_parser.add_argument('--repeat', type=int, default=3)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmark suites and report JSON')
+    run_parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES))
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                            help='Number of data points (1000 up to 100000000)')
+    run_parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS,
+                            default=list(DISTRIBUTIONS))
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    run_parser.add_argument('--baseline', help='JSON report to compare against')
+    run_parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Slowdown (0.1 = 10%%) reported as a regression')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two JSON reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.benchmark == 'html':
+        print(f"{'rows':>10} {'bytes':>12} {'soup (s)':>10} {'stream (s)':>11} {'speedup':>8}")
+        for result in bench_html_engines(args.rows, args.repeat):
+            print(f"{result['rows']:>10} {result['bytes']:>12} {result['soup']:>10.4f} "
+                  f"{result['stream']:>11.4f} {result['soup'] / result['stream']:>7.1f}x")
+        return
+
+    if args.benchmark == 'run':
+        baseline = load_report(args.baseline) if args.baseline else None
+        current = run_suites(args.suites, args.sizes, args.distributions, args.repeat)
+        if args.output:
+            with open(args.output, 'w') as report_file:
+                json.dump(current, report_file, indent=2)
+        elif baseline is None:
+            json.dump(current, sys.stdout, indent=2)
+            print()
+    else:
+        baseline, current = load_report(args.baseline), load_report(args.current)
+
+    if baseline is not None:
+        rows = compare(baseline, current, args.threshold)
+        print_comparison(rows)
+        regressions = sum(row['regression'] for row in rows)
+        print(f"{regressions} regression(s) over {args.threshold:.0%} in {len(rows)} benchmarks")
+        if regressions:
+            exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import pytest
+from benchmarks import NOISE_FLOOR, _result, compare
+
+def report(*timings):
+    """Build a run_suites report from (name, seconds) pairs"""
+    return {'results': [_result('dataset', name, 1000, 'unique', seconds)
+                        for name, seconds in timings]}
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    """Test only benchmarks more than threshold slower are regressions"""
+    baseline = report(('sum', 0.010), ('mean', 0.010), ('median', 0.010))
+    current = report(('sum', 0.0109), ('mean', 0.0115), ('median', 0.005))
+    rows = compare(baseline, current, threshold=0.1)
+    assert [row['name'] for row in rows] == ['sum', 'mean', 'median']
+    assert [row['regression'] for row in rows] == [False, True, False]
+    assert rows[1]['ratio'] == pytest.approx(1.15)
+    assert (rows[1]['baseline'], rows[1]['current']) == (0.010, 0.0115)
+
+def test_compare_threshold():
+    """Test the threshold decides how much slower counts as a regression"""
+    baseline = report(('sum', 0.010))
+    current = report(('sum', 0.015))
+    assert compare(baseline, current, threshold=0.6)[0]['regression'] is False
+    assert compare(baseline, current, threshold=0.4)[0]['regression'] is True
+
+def test_compare_ignores_timings_under_noise_floor():
+    """Test a large ratio below NOISE_FLOOR is not flagged"""
+    baseline = report(('sum', NOISE_FLOOR / 100), ('mean', NOISE_FLOOR / 2))
+    current = report(('sum', NOISE_FLOOR / 10), ('mean', NOISE_FLOOR * 2))
+    rows = compare(baseline, current)
+    assert rows[0]['ratio'] == pytest.approx(10)
+    assert [row['regression'] for row in rows] == [False, True]
+
+def test_compare_skips_benchmarks_missing_from_baseline():
+    """Test benchmarks only in one report are left out"""
+    baseline = report(('sum', 0.010), ('mode', 0.010))
+    current = report(('sum', 0.010), ('histogram', 0.050))
+    rows = compare(baseline, current)
+    assert [row['name'] for row in rows] == ['sum']
+
+def test_compare_zero_baseline():
+    """Test a zero baseline time gives an infinite ratio instead of failing"""
+    rows = compare(report(('sum', 0.0)), report(('sum', 0.010)))
+    assert rows[0]['ratio'] == float('inf')
+    assert rows[0]['regression'] is True
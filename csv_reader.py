@@ -15,7 +15,18 @@ Usage:
     avg = dataset.mean()
     middle = dataset.median()
     
+    # One DataSet per column, from a single pass over the file
+    columns = reader.parse_columns("path/to/sales.csv", columns=["qty", "amount"])
+    print(columns["amount"].sum() / columns["qty"].sum())
+    
+    # Stream a file too large for memory
+    stats = reader.parse_stats("path/to/huge/file.csv")
+    print(stats.count, stats.mean(), stats.min(), stats.max())
+    
 Example commands:
+    # Load every daily shard in a directory (or a glob such as 'data/*.csv')
+    python csv_reader.py data/ --workers 8
+    
     # Process sales data and get total sales
     python -c "from csv_reader import DataSetReaderCsv; reader = DataSetReaderCsv(); dataset = reader.parse('test1.csv'); print(f'Total sales: ${dataset.sum():,.2f}')"
     
@@ -23,8 +34,273 @@ Example commands:
     python -c "from csv_reader import DataSetReaderCsv; reader = DataSetReaderCsv(); dataset = reader.parse('test2.csv'); print(f'Average sale: ${dataset.mean():,.2f}')"
 """
 
+import argparse
 import csv
-from dataset import DataSet
+import glob
+import locale
+import mmap
+import os
+import re
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import profiling
+from dataset import DataSet, RunningStats
+
+# Number of values held in memory at once by the streaming reader
+DEFAULT_CHUNK_SIZE = 65536
+
+# Characters read per block by the fast numeric parser
+FAST_BLOCK_SIZE = 1 << 24
+
+# Bytes of the mapped file converted (and then released) at a time; the
+# cells of a window are briefly boxed, about ten times its size
+MMAP_WINDOW_SIZE = 1 << 20
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+# Where the first cell of a file ends
+CELL_END = re.compile(rb'[,\n\r]')
+
+# ASCII separators that str.strip() removes but bytes.strip() keeps
+ASCII_SEPARATORS = (b'\x1c', b'\x1d', b'\x1e', b'\x1f')
+
+# Files smaller than this are not worth splitting across processes
+PARALLEL_MIN_BYTES = 1 << 20
+
+def _split_cells(text):
+    """Split a block of CSV text (str or bytes) into stripped, non-blank cells."""
+    if isinstance(text, str):
+        return filter(None, map(str.strip, text.replace('\n', ',').split(',')))
+    return filter(None, map(bytes.strip, text.replace(b'\n', b',').split(b',')))
+
+def _parse_numeric_text(text):
+    """Convert a block of purely numeric CSV text to a list of floats.
+    
+    Splits on delimiters and converts with C-level map/filter calls instead
+    of a per-cell Python loop. Returns None if any non-blank cell is not a
+    number, so the caller can fall back to a tolerant path."""
+    try:
+        return list(map(float, _split_cells(text)))
+    except ValueError:
+        return None
+
+def _parse_cells_tolerant(text):
+    """Convert every numeric cell of a block of CSV text, skipping the rest."""
+    values = []
+    for cell in _split_cells(text):
+        try:
+            values.append(float(cell))
+        except ValueError:
+            # Skip non-numeric values silently
+            continue
+    return values
+
+def _needs_decoding(block):
+    """True if bytes.strip() and float(bytes) would treat block differently
+    from the text parse() sees: it has non-ASCII bytes (Unicode spaces and
+    digits) or ASCII separators. Plain `in` scans, much faster than a regex."""
+    return not block.isascii() or any(separator in block for separator in ASCII_SEPARATORS)
+
+class _QuotedCsv(Exception):
+    """Raised by the byte parsers on a quote, which needs csv.reader."""
+
+def _parse_bytes_block(block):
+    """Convert a block of raw CSV bytes (LF, CRLF or CR line endings).
+    
+    Blocks that _needs_decoding() are decoded first, with the encoding
+    parse() reads the file in. Raises _QuotedCsv if the block
+    contains a quote."""
+    if b'"' in block:
+        raise _QuotedCsv()
+    if _needs_decoding(block):
+        block = block.decode(locale.getpreferredencoding(False))
+        if '\r' in block:
+            block = block.replace('\r\n', '\n').replace('\r', '\n')
+    elif b'\r' in block:
+        block = block.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    values = _parse_numeric_text(block)
+    if values is None:
+        values = _parse_cells_tolerant(block)
+    return values
+
+def _parse_mapped(mapped, start, end):
+    """Convert the bytes mapped[start:end] window by window.
+    
+    end must fall on a line boundary (or the end of the file). Returns
+    an array('d'). Each window is copied out of the mapping once, since
+    splitting needs a bytes object, and its pages are released once
+    parsed, so only one window is held besides the unboxed values.
+    Raises _QuotedCsv as soon as a window contains a quote."""
+    values = array('d')
+    position = start
+    if start == 0 and mapped[:len(UTF8_BOM)] == UTF8_BOM:
+        # csv.reader keeps the BOM in the first cell, which never
+        # converts to a number - skip to the end of that cell
+        cell_end = CELL_END.search(mapped, 0, end)
+        position = end if cell_end is None else cell_end.start()
+    released = start - start % mmap.PAGESIZE
+    while position < end:
+        window_end = min(position + MMAP_WINDOW_SIZE, end)
+        if window_end < end:
+            # Stop on a line boundary so no cell is split across windows
+            line_end = mapped.rfind(b'\n', position, window_end)
+            if line_end == -1:
+                line_end = mapped.find(b'\n', window_end, end)
+            window_end = end if line_end == -1 else line_end + 1
+        values.extend(_parse_bytes_block(mapped[position:window_end]))
+        position = window_end
+        # Give the pages we are done with back to the OS
+        release_end = position - position % mmap.PAGESIZE
+        if hasattr(mapped, 'madvise') and release_end > released:
+            mapped.madvise(mmap.MADV_DONTNEED, released, release_end - released)
+            released = release_end
+    return values
+
+def _parse_byte_range(filepath, start, end):
+    """Worker for parse_parallel: parse one line-aligned byte range of a file.
+    Raises _QuotedCsv if the range contains a quote."""
+    with open(filepath, 'rb') as csvfile:
+        with mmap.mmap(csvfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _parse_mapped(mapped, start, end)
+
+def _line_aligned_ranges(filepath, size, parts):
+    """Split a file into up to `parts` byte ranges that each end after a newline."""
+    boundaries = [0]
+    with open(filepath, 'rb') as csvfile:
+        for part in range(1, parts):
+            target = max(size * part // parts, boundaries[-1])
+            csvfile.seek(target)
+            csvfile.readline()  # Move to the start of the next line
+            boundary = min(csvfile.tell(), size)
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+def _is_number(cell):
+    """Return True if a CSV cell converts to a float."""
+    try:
+        float(cell)
+    except ValueError:
+        return False
+    return True
+
+def _looks_like_header(row):
+    """A row is taken as a header if any non-blank cell is not a number."""
+    return any(cell.strip() and not _is_number(cell) for cell in row)
+
+def _select_columns(columns, names, width):
+    """Resolve the columns requested from parse_columns.
+    
+    Returns:
+        list: (key, index) pairs, where key is the name the column's DataSet
+        is returned under"""
+    if columns is None:
+        if names is None:
+            return [(index, index) for index in range(width)]
+        if len(set(names)) != len(names):
+            raise ValueError("Header has duplicate column names; select columns by index")
+        return [(name, index) for index, name in enumerate(names)]
+    
+    selected = []
+    for column in columns:
+        if isinstance(column, int):
+            if column < 0:
+                raise ValueError(f"Column index must not be negative: {column}")
+            selected.append((column, column))
+        elif names is None:
+            raise ValueError(f"Column '{column}' selected by name but the file has no header")
+        elif column not in names:
+            raise ValueError(f"Column '{column}' not found in header")
+        else:
+            selected.append((column, names.index(column)))
+    return selected
+
+def _parse_file(filepath):
+    """Worker for parse_many: parse one whole file into a compact array."""
+    return array('d', DataSetReaderCsv().parse_fast(filepath)._data)
+
+class _TimedLines:
+    """Line iterator over a file that adds up the time spent reading it."""
+    
+    def __init__(self, file):
+        self.file = file
+        self.lines = 0
+        self.seconds = 0.0
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            line = next(self.file)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.lines += 1
+        return line
+
+def _parse_rows_profiled(csvfile, chunk_size):
+    """parse_iter's loop with reading, tokenizing and converting timed
+    separately. Each row is converted in full before any chunk is
+    yielded, so time spent by the consumer is not counted."""
+    lines = _TimedLines(csvfile)
+    rows = csv.reader(lines)
+    clock = time.perf_counter
+    tokenize_seconds = convert_seconds = 0.0
+    row_count = cell_count = 0
+    chunk = array('d')
+    try:
+        while True:
+            start, read_before = clock(), lines.seconds
+            row = next(rows, None)
+            tokenize_seconds += clock() - start - (lines.seconds - read_before)
+            if row is None:
+                break
+            row_count += 1
+            cell_count += len(row)
+            
+            start = clock()
+            values = []
+            for value in row:
+                if value.strip():  # Skip empty values
+                    try:
+                        values.append(float(value.strip()))
+                    except ValueError:
+                        continue
+            convert_seconds += clock() - start
+            
+            for value in values:
+                chunk.append(value)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = array('d')
+        if chunk:
+            yield chunk
+    finally:
+        profiling.record('csv.read', lines.seconds, lines.lines,
+                         os.fstat(csvfile.fileno()).st_size)
+        profiling.record('csv.tokenize', tokenize_seconds, row_count)
+        profiling.record('csv.convert', convert_seconds, cell_count)
+
+def _expand_sources(sources):
+    """Turn a directory, glob pattern, path or list of them into file paths."""
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        source = os.fspath(source)
+        if os.path.isdir(source):
+            paths.extend(sorted(glob.glob(os.path.join(source, '*.csv'))))
+        elif glob.has_magic(source):
+            paths.extend(sorted(glob.glob(source)))
+        else:
+            # Plain paths are kept even if missing so the failure is reported
+            paths.append(source)
+    return paths
 
 class DataSetReaderCsv:
     """Reads numeric data from CSV files into DataSet objects"""
@@ -41,26 +317,337 @@ class DataSetReaderCsv:
         Raises:
             FileNotFoundError: If file doesn't exist
             ValueError: If file contains non-numeric values"""
-        dataset = DataSet()
+        return self._parse_into(filepath, DataSet())
+
+    def _parse_into(self, filepath, dataset):
+        # parse() into the given empty dataset, so that the byte parsers can
+        # hand a file back to it and still return compact storage
+        with profiling.stage('csv.parse'):
+            for chunk in self.parse_iter(filepath):
+                dataset.include_many(chunk)
+            return dataset
+
+    def parse_fast(self, filepath):
+        """Parse a purely numeric CSV file with a vectorised fast path.
         
+        The file is read in large blocks that are split and converted in bulk.
+        As soon as a non-numeric cell (or a quoted cell) is found, parsing
+        restarts with parse(), so the result is always the same as parse().
+        A leading UTF-8 BOM is handled the way parse() handles it: the
+        first cell it is attached to is skipped.
+        
+        Args:
+            filepath: Path to CSV file to parse
+            
+        Returns:
+            DataSet: New dataset containing the numeric values
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist"""
+        values = []
         try:
             with open(filepath, 'r') as csvfile:
-                reader = csv.reader(csvfile)
-                for row in reader:
-                    for value in row:
-                        if value.strip():  # Skip empty values
+                first_block = True
+                while True:
+                    block = csvfile.read(FAST_BLOCK_SIZE)
+                    if not block:
+                        break
+                    # Finish the current line so no cell is split across blocks
+                    block += csvfile.readline()
+                    if first_block and block.startswith('\ufeff'):
+                        # csv.reader keeps the BOM in the first cell, which
+                        # never converts to a number - drop that cell too
+                        first_line, newline, rest = block.partition('\n')
+                        block = first_line.partition(',')[2] + newline + rest
+                    first_block = False
+                    parsed = _parse_numeric_text(block)
+                    if parsed is None:
+                        return self.parse(filepath)
+                    values.extend(parsed)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Could not find CSV file: {filepath}")
+        
+        dataset = DataSet()
+        dataset.include_many(values)
+        return dataset
+
+    def parse_mmap(self, filepath):
+        """Parse a CSV file by memory-mapping it instead of reading it as text.
+        
+        Numbers are converted straight from the mapped bytes, one window at a
+        time, and each window's pages are handed back to the OS once it has
+        been parsed, so resident memory stays bounded for very large files.
+        LF, CRLF and CR line endings are accepted, a leading BOM is treated
+        as in parse(), and windows with non-ASCII bytes are decoded so that
+        Unicode whitespace and digits convert as in parse(). Quotes need
+        csv.reader's quoting rules, so the first window containing one
+        hands the whole file to parse(). Values are collected unboxed and
+        returned in compact storage (8 bytes per value) on every path.
+        
+        Throughput of the last call is stored in self.last_stats as a dict
+        with 'bytes', 'seconds' and 'bytes_per_second'.
+        
+        Args:
+            filepath: Path to CSV file to parse
+            
+        Returns:
+            DataSet: New compact dataset containing the numeric values
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist"""
+        start_time = time.perf_counter()
+        try:
+            csvfile = open(filepath, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Could not find CSV file: {filepath}")
+        
+        values = array('d')
+        with csvfile:
+            size = os.fstat(csvfile.fileno()).st_size
+            if size > 0:
+                with mmap.mmap(csvfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    try:
+                        values = _parse_mapped(mapped, 0, size)
+                    except _QuotedCsv:
+                        values = None
+        
+        if values is None:
+            dataset = self._parse_into(filepath, DataSet(compact=True))
+        else:
+            dataset = DataSet.from_buffer(values)
+        seconds = time.perf_counter() - start_time
+        self.last_stats = {
+            'bytes': size,
+            'seconds': seconds,
+            'bytes_per_second': size / seconds if seconds > 0 else 0.0,
+        }
+        return dataset
+
+    def parse_parallel(self, filepath, workers=None, min_bytes=PARALLEL_MIN_BYTES):
+        """Parse a CSV file on several cores at once.
+        
+        The file is cut into line-aligned byte ranges that are parsed in a
+        ProcessPoolExecutor, each as parse_mmap() parses a file. Each worker
+        returns an array('d') and the arrays are copied once, in file order,
+        into a compact DataSet, so the values (including their order and
+        mode() tie-breaking) are those of parse(). If a worker finds a quote
+        the file is parsed serially as parse() parses it, and files smaller
+        than min_bytes with parse_mmap(); the result is compact either way.
+        
+        Args:
+            filepath: Path to CSV file to parse
+            workers: Number of worker processes (defaults to the CPU count)
+            min_bytes: Files smaller than this are parsed in this process
+            
+        Returns:
+            DataSet: New compact dataset containing the numeric values
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist"""
+        try:
+            size = os.path.getsize(filepath)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Could not find CSV file: {filepath}")
+        
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or size == 0 or size < min_bytes:
+            return self.parse_mmap(filepath)
+        
+        ranges = _line_aligned_ranges(filepath, size, workers)
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            futures = [executor.submit(_parse_byte_range, filepath, start, end)
+                       for start, end in ranges]
+            try:
+                # Collect in submission order to keep the file order of values
+                parts = [future.result() for future in futures]
+            except _QuotedCsv:
+                for future in futures:
+                    future.cancel()
+                parts = None
+        if parts is None:
+            return self._parse_into(filepath, DataSet(compact=True))
+        return DataSet.concat(parts)
+
+    def parse_many(self, sources, workers=None):
+        """Parse many CSV files concurrently and merge them into one DataSet.
+        
+        Files are parsed in a bounded ProcessPoolExecutor and their values are
+        copied into a single compact buffer that is allocated once, in file
+        order. A file that cannot be read is reported in the returned failures
+        and does not stop the rest of the batch.
+        
+        Args:
+            sources: Directory (all *.csv files in it), glob pattern, file
+                path, or a list of any of these
+            workers: Maximum number of worker processes (defaults to the CPU count)
+            
+        Returns:
+            tuple: (DataSet, failures) where failures maps each file that
+            could not be parsed to its error message"""
+        paths = _expand_sources(sources)
+        parts = []
+        failures = {}
+        if paths:
+            workers = min(workers or os.cpu_count() or 1, len(paths))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_parse_file, path) for path in paths]
+                for path, future in zip(paths, futures):
+                    try:
+                        parts.append(future.result())
+                    except (OSError, ValueError, csv.Error) as e:
+                        failures[path] = str(e)
+        return DataSet.concat(parts), failures
+
+    def parse_iter(self, filepath, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Stream the numeric values of a CSV file in fixed-size chunks.
+        
+        Only one chunk is held in memory at a time, so files of any size
+        can be processed. Values are skipped exactly as in parse().
+        
+        Args:
+            filepath: Path to CSV file to parse
+            chunk_size: Number of values per chunk (the last chunk may be shorter)
+            
+        Yields:
+            array: array('d') of up to chunk_size values, in file order
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If chunk_size is not positive"""
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        try:
+            csvfile = open(filepath, 'r')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Could not find CSV file: {filepath}")
+            
+        with csvfile:
+            if profiling.ENABLED:
+                yield from _parse_rows_profiled(csvfile, chunk_size)
+                return
+            chunk = array('d')
+            for row in csv.reader(csvfile):
+                for value in row:
+                    if value.strip():  # Skip empty values
+                        try:
+                            # Convert to float to handle both integers and decimals
+                            chunk.append(float(value.strip()))
+                        except ValueError:
+                            # Skip non-numeric values silently
+                            continue
+                        if len(chunk) == chunk_size:
+                            yield chunk
+                            chunk = array('d')
+            if chunk:
+                yield chunk
+
+    def parse_columns(self, filepath, columns=None, header='auto'):
+        """Parse a CSV file into one DataSet per column in a single pass.
+        
+        Every row is read once and each selected cell goes straight to its
+        column, so statistics over several columns cost one read of the
+        file. Non-numeric and blank cells are skipped as in parse(), and
+        short rows simply contribute nothing to the missing columns. The file
+        is decoded with the locale encoding as in parse(), but unlike parse()
+        a leading BOM is stripped so that the first cell (or the first header
+        name) is read normally. Blank rows before the first row are skipped.
+        
+        Args:
+            filepath: Path to CSV file to parse
+            columns: Header names and/or 0-based indexes to read (defaults to
+                every column of the first row)
+            header: True if the first row holds column names, False if it is
+                data, or 'auto' to treat it as a header when any of its cells
+                is not a number
+            
+        Returns:
+            dict: DataSet per column, keyed by the name or index it was
+            selected with (header names, or indexes if there is no header,
+            when columns is None)
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If a selected column is not in the header"""
+        try:
+            csvfile = open(filepath, 'r', newline='')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Could not find CSV file: {filepath}")
+        
+        with csvfile:
+            if csvfile.read(1) != '\ufeff':
+                csvfile.seek(0)  # Not a BOM, so keep the first character
+            rows = csv.reader(csvfile)
+            first = next((row for row in rows if any(cell.strip() for cell in row)), [])
+            has_header = _looks_like_header(first) if header == 'auto' else bool(header)
+            names = [cell.strip() for cell in first] if has_header else None
+            selected = _select_columns(columns, names, len(first))
+            values = [array('d') for _ in selected]
+            targets = [(index, column.append) for (_, index), column in zip(selected, values)]
+            
+            for row in rows if has_header else chain([first], rows):
+                width = len(row)
+                for index, append in targets:
+                    if index < width:
+                        cell = row[index].strip()
+                        if cell:  # Skip empty values
                             try:
-                                # Convert to float to handle both integers and decimals
-                                num = float(value.strip())
-                                dataset.include(num)
+                                append(float(cell))
                             except ValueError:
                                 # Skip non-numeric values silently
                                 continue
-                            
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Could not find CSV file: {filepath}")
+        
+        datasets = {}
+        for (key, _), column in zip(selected, values):
+            dataset = DataSet()
+            dataset.include_many(column)
+            datasets[key] = dataset
+        return datasets
+
+    def parse_stats(self, filepath, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Fold a CSV file into RunningStats without keeping its values.
+        
+        Memory use is bounded by chunk_size no matter how large the file is.
+        
+        Args:
+            filepath: Path to CSV file to parse
+            chunk_size: Number of values parsed per chunk
             
-        return dataset
+        Returns:
+            RunningStats: count, sum, mean, min and max of the numeric values
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist"""
+        stats = RunningStats()
+        for chunk in self.parse_iter(filepath, chunk_size):
+            stats.add_many(chunk)
+        return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Read numeric data from CSV files into one DataSet')
+    parser.add_argument('sources', nargs='+', help='CSV files, directories or glob patterns')
+    parser.add_argument('--workers', type=int, help='Maximum number of files parsed at once')
+    args = parser.parse_args()
+    
+    reader = DataSetReaderCsv()
+    dataset, failures = reader.parse_many(args.sources, workers=args.workers)
+    for path, error in failures.items():
+        print(f"Error: {path}: {error}")
+    if len(dataset._data) == 0 and failures:
+        exit(1)
+        
+    summary = dataset.describe()
+    print(f"Successfully loaded {summary.count} values")
+    print(f"Sum: {summary.sum}")
+    print(f"Mean: {summary.mean}")
+    print(f"Median: {summary.median}")
+    print(f"Mode: {summary.mode}")
+    print(f"Range: {(summary.min, summary.max)}")
+    print(f"Std dev: {summary.stddev}")
+
+if __name__ == "__main__":
+    main()
 
 # Usage: Can be run from console with 
 # python -c "from csv_reader import DataSetReaderCsv; reader = DataSetReaderCsv(); dataset = reader.parse('csv1.csv'); print(f'Total: {dataset.sum()}, Average: {dataset.mean()}, Median: {dataset.median()}')"
+# or, for a whole directory of shards:
+# python csv_reader.py shards/ --workers 8
@@ -1,4 +1,5 @@
 import pytest
+import math
 import os
 import tempfile
 from csv_reader import DataSetReaderCsv
@@ -75,3 +76,232 @@ def test_scientific_notation(reader, temp_dir):
     dataset = reader.parse(path)
     assert dataset.sum() == pytest.approx(3100.2)
     assert dataset.mean() == pytest.approx(1033.4)  # Average of 100, 0.2, 3000
+
+def test_parse_iter_yields_fixed_size_chunks(reader, temp_dir):
+    """Test streaming values in fixed-size chunks in file order"""
+    csv_content = "1,2,3\n4,x,5\n,6,7"
+    path = create_test_file(temp_dir, csv_content)
+    chunks = [list(chunk) for chunk in reader.parse_iter(path, chunk_size=3)]
+    assert chunks == [[1, 2, 3], [4, 5, 6], [7]]
+
+def test_parse_iter_invalid_chunk_size(reader, temp_dir):
+    """Test rejecting a chunk size below one"""
+    path = create_test_file(temp_dir, "1,2")
+    with pytest.raises(ValueError):
+        list(reader.parse_iter(path, chunk_size=0))
+
+def test_parse_stats_matches_parse(reader, temp_dir):
+    """Test folding chunks into aggregates without building a DataSet"""
+    csv_content = "1,2,3\n4.5,abc,-6.5\n10,,"
+    path = create_test_file(temp_dir, csv_content)
+    dataset = reader.parse(path)
+    stats = reader.parse_stats(path, chunk_size=2)
+    assert stats.count == len(dataset._data) == 6
+    assert stats.sum() == pytest.approx(dataset.sum())
+    assert stats.mean() == pytest.approx(dataset.mean())
+    assert (stats.min(), stats.max()) == dataset.range()
+
+def test_infinities_of_both_signs(reader, temp_dir):
+    """Test a file holding inf and -inf loads with a nan sum on every path"""
+    path = create_test_file(temp_dir, "1,inf,-inf\n2")
+    for parse in (reader.parse, reader.parse_fast, reader.parse_mmap):
+        dataset = parse(path)
+        assert list(dataset._data) == [1, float('inf'), float('-inf'), 2]
+        assert math.isnan(dataset.sum())
+    stats = reader.parse_stats(path)
+    assert stats.count == 4
+    assert math.isnan(stats.sum())
+
+def test_parse_stats_invalid_file(reader):
+    """Test streaming a non-existent file"""
+    with pytest.raises(FileNotFoundError):
+        reader.parse_stats("nonexistent.csv")
+
+@pytest.mark.parametrize("csv_content", [
+    "1,2,3\n4.5,5.5,6.5",
+    " 1 , 2 , 3 \n 4.5 , 5.5 , 6.5 \n\n",
+    "1,,2\n,3,\n4,,",
+    "1e2,2e-1,3E3\r\n-4,inf,5",
+    "1,abc,2\n3,4.5,xyz",
+    '1,"2",3\n"4,5",6',
+    "\ufeff1,6,99\n2,7,99",
+    "\ufeff\n1,2",
+    "",
+])
+def test_parse_fast_matches_parse(reader, temp_dir, csv_content):
+    """Test the fast path gives exactly the same values as parse()"""
+    path = create_test_file(temp_dir, csv_content)
+    assert reader.parse_fast(path)._data == reader.parse(path)._data
+
+def test_parse_fast_sample_files(reader):
+    """Test the fast path on the BOM-prefixed sample files"""
+    for name in ("csv1.csv", "csv2.csv"):
+        path = os.path.join(os.path.dirname(__file__), name)
+        assert reader.parse_fast(path)._data == reader.parse(path)._data
+
+def test_parse_fast_invalid_file(reader):
+    """Test handling non-existent file in the fast path"""
+    with pytest.raises(FileNotFoundError):
+        reader.parse_fast("nonexistent.csv")
+
+@pytest.mark.parametrize("csv_content", [
+    "1,2,3\n4.5,5.5,6.5",
+    "1,,2\r\n,3,\r\n4,abc,",
+    "1\r2\r3,x",
+    '1,"2",3',
+    "\ufeff1,6,99\n2,7,99\n",
+    "x,\xa010\xa0",
+    "\x1c8,\x1f9\x1e",
+    "\u0661,2\u2003\n\u0663.5",
+])
+def test_parse_mmap_matches_parse(reader, temp_dir, csv_content):
+    """Test memory-mapped parsing gives the same values as parse()"""
+    path = create_test_file(temp_dir, "")
+    with open(path, 'w', newline='') as f:
+        f.write(csv_content)
+    assert list(reader.parse_mmap(path)._data) == reader.parse(path)._data
+
+def test_parse_mmap_spans_windows(reader, temp_dir, monkeypatch):
+    """Test values are not lost or split at window boundaries"""
+    import csv_reader
+    monkeypatch.setattr(csv_reader, "MMAP_WINDOW_SIZE", 7)
+    csv_content = "\n".join(",".join(str(i * 3 + j) for j in range(3)) for i in range(50))
+    path = create_test_file(temp_dir, csv_content)
+    dataset = reader.parse_mmap(path)
+    assert list(dataset._data) == [float(i) for i in range(150)]
+
+def test_parse_mmap_quote_in_later_window(reader, temp_dir, monkeypatch):
+    """Test a quote found after the first window hands the file to parse()"""
+    import csv_reader
+    monkeypatch.setattr(csv_reader, "MMAP_WINDOW_SIZE", 8)
+    path = create_test_file(temp_dir, '1,2,3\n4,5,6\n7,"8,9",10\n')
+    dataset = reader.parse_mmap(path)
+    assert dataset._compact
+    assert list(dataset._data) == reader.parse(path)._data == [1, 2, 3, 4, 5, 6, 7, 10]
+
+def test_parse_mmap_reports_throughput(reader, temp_dir):
+    """Test bytes/sec statistics are recorded"""
+    path = create_test_file(temp_dir, "1,2,3\n")
+    reader.parse_mmap(path)
+    assert reader.last_stats['bytes'] == 6
+    assert reader.last_stats['bytes_per_second'] >= 0
+
+def test_parse_mmap_empty_and_missing_file(reader, temp_dir):
+    """Test empty files and non-existent files"""
+    path = create_test_file(temp_dir, "")
+    assert reader.parse_mmap(path).sum() == 0
+    with pytest.raises(FileNotFoundError):
+        reader.parse_mmap("nonexistent.csv")
+
+def test_parse_parallel_matches_parse(reader, temp_dir):
+    """Test parallel parsing keeps values and file order"""
+    rows = [f"{i},{i % 7}.5,x{i},\ufeff" if i % 5 else f"{i},,{-i}" for i in range(2000)]
+    path = create_test_file(temp_dir, "\ufeff" + "\r\n".join(rows))
+    dataset = reader.parse_parallel(path, workers=4, min_bytes=0)
+    expected = reader.parse(path)
+    assert dataset._compact
+    assert list(dataset._data) == expected._data
+    assert dataset.mode() == expected.mode()
+
+def test_parse_parallel_quotes_and_unicode(reader, temp_dir):
+    """Test quotes found by a worker fall back to parse() and non-ASCII cells convert"""
+    rows = [f"{i},\xa0{i}\u2003" for i in range(1000)]
+    path = create_test_file(temp_dir, "\n".join(rows))
+    assert list(reader.parse_parallel(path, workers=4, min_bytes=0)._data) == reader.parse(path)._data
+    rows[900] = '900,"9,0"'
+    path = create_test_file(temp_dir, "\n".join(rows))
+    dataset = reader.parse_parallel(path, workers=4, min_bytes=0)
+    assert dataset._compact
+    assert list(dataset._data) == reader.parse(path)._data
+
+def test_parse_parallel_small_file(reader, temp_dir):
+    """Test small files are parsed serially with the same result"""
+    path = create_test_file(temp_dir, "1,2,3\n4,5")
+    dataset = reader.parse_parallel(path, workers=4)
+    assert dataset._compact
+    assert list(dataset._data) == [1, 2, 3, 4, 5]
+
+def test_parse_parallel_invalid_file(reader):
+    """Test handling non-existent file in parallel mode"""
+    with pytest.raises(FileNotFoundError):
+        reader.parse_parallel("nonexistent.csv")
+
+def test_parse_many_merges_in_file_order(reader, temp_dir):
+    """Test a directory of files is merged in sorted file order"""
+    for name, content in [("b.csv", "3,4"), ("a.csv", "1,x,2"), ("c.txt", "99")]:
+        with open(os.path.join(temp_dir, name), 'w') as f:
+            f.write(content)
+    dataset, failures = reader.parse_many(temp_dir, workers=2)
+    assert list(dataset._data) == [1, 2, 3, 4]
+    assert failures == {}
+
+def test_parse_many_glob_and_failures(reader, temp_dir):
+    """Test a missing file is reported without aborting the batch"""
+    path = create_test_file(temp_dir, "5,6")
+    missing = os.path.join(temp_dir, "missing.csv")
+    dataset, failures = reader.parse_many([os.path.join(temp_dir, "*.csv"), missing])
+    assert list(dataset._data) == [5, 6]
+    assert list(failures) == [missing]
+
+def test_parse_columns_with_header(reader, temp_dir):
+    """Test a header row is detected and columns are keyed by name"""
+    path = create_test_file(temp_dir, "id,qty,amount\n1,2,10.5\n2,3,abc\n3,,4.5")
+    columns = reader.parse_columns(path)
+    assert list(columns) == ['id', 'qty', 'amount']
+    assert columns['id']._data == [1, 2, 3]
+    assert columns['qty']._data == [2, 3]
+    assert columns['amount']._data == [10.5, 4.5]
+
+def test_parse_columns_selection(reader, temp_dir):
+    """Test columns selected by name and by index, in the order requested"""
+    path = create_test_file(temp_dir, "id,qty,amount\n1,2,10\n2,3,20\n3")
+    columns = reader.parse_columns(path, columns=['amount', 0])
+    assert list(columns) == ['amount', 0]
+    assert columns['amount'].sum() == 30
+    assert columns[0].sum() == 6
+
+def test_parse_columns_without_header(reader):
+    """Test a numeric first row is data, keeping the BOM-prefixed first cell"""
+    columns = reader.parse_columns(os.path.join(os.path.dirname(__file__), 'csv2.csv'))
+    assert columns[0]._data == [88, 12, 15]
+    assert columns[2].sum() == 2898092 + 2782789 + 2672670
+
+def test_parse_columns_header_override(reader, temp_dir):
+    """Test header=True and header=False override detection"""
+    path = create_test_file(temp_dir, "1,2\n3,4")
+    assert reader.parse_columns(path, header=True)['1']._data == [3]
+    path = create_test_file(temp_dir, "a,b\n3,4")
+    assert reader.parse_columns(path, header=False)[1]._data == [4]
+
+def test_parse_columns_matches_parse(reader, temp_dir):
+    """Test the columns together hold the same values as parse()"""
+    path = create_test_file(temp_dir, "1,2,3\n4.5,x,6.5\n7,8,9")
+    columns = reader.parse_columns(path)
+    assert sum(column.sum() for column in columns.values()) == reader.parse(path).sum()
+
+def test_parse_columns_unknown_column(reader, temp_dir):
+    """Test selecting a missing name, or a name without a header, raises ValueError"""
+    path = create_test_file(temp_dir, "id,qty\n1,2")
+    with pytest.raises(ValueError, match="not found"):
+        reader.parse_columns(path, columns=['amount'])
+    with pytest.raises(ValueError, match="no header"):
+        reader.parse_columns(path, columns=['qty'], header=False)
+
+def test_parse_columns_leading_blank_rows(reader, temp_dir):
+    """Test blank rows before the header do not hide the columns"""
+    path = create_test_file(temp_dir, "\n \nid,qty\n1,2\n3,4")
+    columns = reader.parse_columns(path)
+    assert list(columns) == ['id', 'qty']
+    assert columns['qty']._data == [2, 4]
+
+def test_parse_columns_bom_header(reader, temp_dir):
+    """Test a BOM before the header is stripped from the first name"""
+    path = create_test_file(temp_dir, "\ufeffid,qty\n1,2")
+    columns = reader.parse_columns(path)
+    assert list(columns) == ['id', 'qty']
+    assert columns['id']._data == [1]
+
+def test_parse_columns_invalid_file(reader):
+    """Test handling of non-existent file"""
+    with pytest.raises(FileNotFoundError):
+        reader.parse_columns("nonexistent.csv")
@@ -1,73 +1,626 @@
 import argparse
+from array import array
+from bisect import bisect_left, bisect_right, insort
+import codecs
+from collections import Counter, namedtuple
+import hashlib
+from itertools import chain, compress, count, islice, repeat
+import json
+import math
+import mmap as _mmap
+import operator
+import os
+import profiling
+import struct
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
 import requests
+import requests.adapters
 from bs4 import BeautifulSoup
 
-class DataSet:
+# memoryview formats that hold plain numbers and can be added without
+# checking each value individually
+_NUMERIC_FORMATS = frozenset('?bBhHiIlLqQnNfd')
+
+def _numeric_view(buffer):
+  """Returns a flat memoryview over buffer.
+  Raises TypeError if the buffer does not hold plain numbers. bytes and
+  bytearray are text as often as not, so they are rejected rather than
+  read as unsigned bytes; wrap them in array('B', ...) to add them."""
+  view = memoryview(buffer)
+  if isinstance(view.obj, (bytes, bytearray)):
+    raise TypeError("bytes are not numbers; use array('B', data) to add byte values")
+  if view.format.lstrip('@') not in _NUMERIC_FORMATS:
+    raise TypeError("Data point must be a number")
+  if view.ndim > 1:
+    if not view.c_contiguous:
+      raise TypeError("Multi-dimensional buffers must be contiguous")
+    view = view.cast('B').cast(view.format.lstrip('@'))
+  return view
+
+_numpy_module = None
+
+def _numpy():
+  """Returns the numpy module, or None if it is not installed.
+  NumPy is optional; it is imported on first use."""
+  global _numpy_module
+  if _numpy_module is None:
+    try:
+      import numpy
+    except ImportError:
+      numpy = False
+    _numpy_module = numpy
+  return _numpy_module or None
+
+def _is_float64(value):
+  """True if value is a number that a float64 holds exactly."""
+  try:
+    return isinstance(value, (int, float)) and float(value) == value
+  except OverflowError:
+    return False
+
+# HTTP statuses worth retrying in DataSetReaderWeb.parse_many
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Tags whose text BeautifulSoup does not report in stripped_strings
+HIDDEN_TEXT_TAGS = frozenset({'script', 'style', 'template', 'rt', 'rp'})
+
+# Tags that never have content, so are never left open
+VOID_TAGS = frozenset({'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                       'keygen', 'link', 'menuitem', 'meta', 'param', 'source',
+                       'spacer', 'track', 'wbr', 'basefont', 'bgsound', 'command',
+                       'frame', 'image', 'isindex', 'nextid'})
+
+# Extraction engines accepted by DataSetReaderWeb
+WEB_ENGINES = ('soup', 'stream')
+
+# Bytes read from the socket at a time by DataSetReaderWeb.parse_stream
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Defaults for the on-disk page cache used by DataSetReaderWeb
+DEFAULT_CACHE_DIR = '.dataset_cache'
+DEFAULT_CACHE_MB = 64
+
+# Binary file layout written by DataSet.save(): a fixed header followed by
+# `count` little-endian float64 values and, if FLAG_SORTED is set, the same
+# values again in sorted order. The header carries the running aggregates.
+FILE_MAGIC = b'DSET'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sHHQ6d')
+FLAG_SORTED = 1
+
+# Batches up to this size are added to the sorted index one insort at a
+# time; larger ones are merged into a new copy of it
+INDEX_INSORT_MAX = 8
+
+def _array_from_view(view):
+  """Returns a writable array('d') copy of a float64 memoryview."""
+  storage = array('d')
+  storage.frombytes(view.cast('B'))
+  return storage
+
+def _split_nans(values):
+  """Returns (numbers, nans): the values that are not NaN and those that
+  are, each in their original order. A NaN is the only value not equal
+  to itself, and it has no place in a sorted order."""
+  if not isinstance(values, (list, array, memoryview)):
+    values = list(values)
+  if operator.countOf(map(operator.eq, values, values), False) == 0:
+    return values, []
+  equal = list(map(operator.eq, values, values))
+  return list(compress(values, equal)), list(compress(values, map(operator.not_, equal)))
+
+def _merge_into_index(index, end, batch):
+  """Returns a copy of the sorted index with the sorted list batch merged
+  into index[:end]; index[end:] (its NaNs) stays at the end.
+  With NumPy this is one searchsorted and insert over the raw buffer;
+  otherwise the runs of the index between insertion points are copied as
+  slices. Either way the index is never boxed value by value."""
+  numpy = _numpy()
+  if numpy is not None and isinstance(index, array):
+    block = numpy.frombuffer(index, dtype=numpy.float64)
+    positions = numpy.searchsorted(block[:end], batch, side='right')
+    merged = array('d')
+    merged.frombytes(memoryview(numpy.insert(block, positions, batch)).cast('B'))
+    return merged
+  merged = index[:0]
+  start = 0
+  for value in batch:
+    position = bisect_right(index, value, start, end)
+    merged.extend(index[start:position])
+    merged.append(value)
+    start = position
+  merged.extend(index[start:])
+  return merged
+
+def _trailing_nans(index):
+  """Returns how many NaNs a sorted index ends with."""
+  count = 0
+  for value in reversed(index):
+    if value == value:
+      break
+    count += 1
+  return count
+
+def _write_float64(file, values):
+  """Writes values to file as little-endian float64s."""
+  if isinstance(values, memoryview):
+    values = _array_from_view(values)
+  elif not isinstance(values, array):
+    iterator = iter(values)
+    while True:
+      chunk = array('d', islice(iterator, 1 << 16))
+      if not chunk:
+        return
+      _write_float64(file, chunk)
+  if sys.byteorder == 'big':
+    values = array('d', values)
+    values.byteswap()
+  file.write(values.tobytes())
+
+class RunningStats:
+  """Running count, sum, min, max and variance of a stream of values.
+  The sum uses Neumaier compensated summation so long streams of floats
+  do not pile up rounding error, and the variance uses Welford's update
+  (Chan et al. for batches). Two RunningStats can be merged, so partial
+  results from chunks or other datasets combine in O(1)."""
+
   def __init__(self):
-    self._data = list()
+    self.count = 0
+    self._total = 0
+    self._compensation = 0
+    self._min = None
+    self._max = None
+    self._mean = 0.0
+    self._m2 = 0.0
+
+  def _add_to_total(self, value):
+    total = self._total + value
+    if abs(self._total) >= abs(value):
+      self._compensation += (self._total - total) + value
+    else:
+      self._compensation += (value - total) + self._total
+    self._total = total
+
+  def _merge_moments(self, count, mean, m2):
+    # Combines mean and sum of squared deviations of another batch of
+    # `count` values; must run before self.count is updated
+    total_count = self.count + count
+    delta = mean - self._mean
+    self._mean += delta * count / total_count
+    self._m2 += m2 + delta * delta * self.count * count / total_count
+
+  def add(self, value):
+    """Folds a single value into the statistics. An int too large for a
+    float is counted as +/-inf in the sum and moments (min and max keep
+    it exactly), so adding never raises."""
+    number = value
+    try:
+      delta = number - self._mean
+    except OverflowError:
+      number = math.inf if value > 0 else -math.inf
+      delta = number - self._mean
+    self.count += 1
+    self._add_to_total(number)
+    self._mean += delta / self.count
+    self._m2 += delta * (number - self._mean)
+    if self._min is None:
+      self._min = self._max = value
+    elif value < self._min:
+      self._min = value
+    elif value > self._max:
+      self._max = value
+
+  def add_many(self, values):
+    """Folds a sequence of values (list, array, memoryview) into the
+    statistics using C-level reductions."""
+    if len(values) == 0:
+      return
+    try:
+      batch_total = math.fsum(values)
+      batch_mean = batch_total / len(values)
+      # Streamed, so no list of deviations as long as the batch is built
+      batch_m2 = math.fsum(deviation * deviation for deviation in
+                           map(operator.sub, values, repeat(batch_mean)))
+    except (OverflowError, ValueError):
+      # An int too large for a float, a sum beyond the float range, or
+      # inf and -inf together (fsum raises on those); add() handles them
+      for value in values:
+        self.add(value)
+      return
+    self._merge_moments(len(values), batch_mean, batch_m2)
+    self.count += len(values)
+    self._add_to_total(batch_total)
+    low, high = min(values), max(values)
+    if self._min is None:
+      self._min, self._max = low, high
+    else:
+      self._min = min(self._min, low)
+      self._max = max(self._max, high)
+
+  def merge(self, other):
+    """Folds the statistics of another RunningStats into this one."""
+    if other.count == 0:
+      return
+    self._merge_moments(other.count, other._mean, other._m2)
+    self.count += other.count
+    self._add_to_total(other._total)
+    self._add_to_total(other._compensation)
+    if self._min is None:
+      self._min, self._max = other._min, other._max
+    else:
+      self._min = min(self._min, other._min)
+      self._max = max(self._max, other._max)
+
+  def sum(self):
+    """Returns the compensated sum, or 0 if nothing was added."""
+    if not math.isfinite(self._total):
+      # inf/nan make the compensation term meaningless
+      return self._total
+    return self._total + self._compensation
+
+  def mean(self):
+    """Returns the mean, or 0 if nothing was added."""
+    if self.count == 0:
+      return 0
+    return self.sum() / self.count
+
+  def variance(self):
+    """Returns the population variance, or 0 if nothing was added."""
+    if self.count == 0:
+      return 0
+    variance = self._m2 / self.count
+    if variance < 0:
+      # M2 is a sum of squares: below zero it is either rounding error or
+      # (at -inf) deviations too large for a float
+      return math.inf if math.isinf(variance) else 0.0
+    return variance
+
+  def min(self):
+    """Returns the smallest value, or 0 if nothing was added."""
+    return 0 if self._min is None else self._min
+
+  def max(self):
+    """Returns the largest value, or 0 if nothing was added."""
+    return 0 if self._max is None else self._max
+
+DataSetSummary = namedtuple('DataSetSummary', [
+  'count', 'sum', 'mean', 'variance', 'stddev', 'min', 'max',
+  'median', 'mode', 'quantiles'])
+
+class DataSet:
+  def __init__(self, compact=False):
+    """Creates an empty dataset.
+    If compact is True, values are stored unboxed in an array('d')
+    (8 bytes per value) instead of a list of Python numbers."""
+    self._compact = compact
+    self._data = array('d') if compact else list()
+    self._stats = RunningStats()
+    # Sorted copy of _data, built on first use by median/quantile or
+    # build_index() and kept in step with every insert after that. NaNs
+    # are kept after the sorted values, _sorted_nans of them, and range
+    # queries only search the values before them.
+    self._sorted = None
+    self._sorted_nans = 0
+    # Frequency table for mode(), built on first use and then kept in
+    # step with every insert: counts (a Counter keeps values in the order
+    # they were first seen), the highest count, the set of values that
+    # have it (None until mode() first needs it) and each value's
+    # first-seen position (None until mode() first finds several modes)
+    self._frequency = None
+    self._max_count = 0
+    self._modes = None
+    self._first_seen = None
 
   def include(self, data_point):
     if not isinstance(data_point, (int, float)):
       raise TypeError("Data point must be a number")
-    self._data.append(data_point)
+    self._writable().append(data_point)
+    # Never raises, so the storage and the statistics stay in step
+    self._stats.add(data_point)
+    if self._sorted is not None:
+      if data_point == data_point:
+        insort(self._sorted, data_point, 0, len(self._sorted) - self._sorted_nans)
+      else:
+        self._sorted.append(data_point)
+        self._sorted_nans += 1
+    if self._frequency is not None:
+      self._count_value(data_point)
+
+  def include_many(self, data_points):
+    """Adds a batch of values to the dataset in a single operation.
+    Accepts any iterable of numbers as well as buffers such as array,
+    memoryview or NumPy arrays. The whole batch is validated before
+    anything is added, so a TypeError (or, with compact storage, an
+    OverflowError for an int too large for a float) leaves the dataset
+    unchanged."""
+    with profiling.stage('dataset.include_many') as timer:
+      try:
+        view = memoryview(data_points)
+      except TypeError:
+        # Not a buffer - validate a plain iterable in one pass
+        values = list(data_points)
+        if not all(map(isinstance, values, repeat((int, float)))):
+          raise TypeError("Data point must be a number")
+      else:
+        view = _numeric_view(view)
+        if (self._compact and view.c_contiguous
+            and view.format.lstrip('@') == 'd'):
+          # Same layout as our storage - copy the raw bytes across
+          self._stats.add_many(view)
+          self._writable().frombytes(view.cast('B'))
+          self._extend_index(view)
+          if self._frequency is not None:
+            self._count_values(view)
+          timer.items = len(view)
+          return
+        values = view.tolist()
+      timer.items = len(values)
+      if self._compact:
+        # array.extend() stops part way on a value it cannot convert,
+        # so convert the whole batch before touching the storage
+        values = array('d', values)
+      self._stats.add_many(values)
+      self._writable().extend(values)
+      self._extend_index(values)
+      if self._frequency is not None:
+        self._count_values(values)
+
+  @classmethod
+  def from_buffer(cls, buffer, compact=True):
+    """Returns a new dataset holding the values of a numeric buffer
+    (array, memoryview, NumPy array, ...). The result uses compact
+    storage unless compact is False."""
+    dataset = cls(compact=compact)
+    dataset.include_many(buffer)
+    return dataset
+
+  @classmethod
+  def concat(cls, buffers, compact=True):
+    """Returns a new dataset holding the values of several numeric
+    buffers, in order. Storage for the result is allocated once up
+    front rather than grown buffer by buffer."""
+    views = [_numeric_view(buffer) for buffer in buffers]
+    dataset = cls(compact=compact)
+    if not compact:
+      for view in views:
+        dataset.include_many(view)
+      return dataset
+
+    storage = array('d', [0.0]) * sum(len(view) for view in views)
+    target = memoryview(storage)
+    offset = 0
+    for view in views:
+      if view.format.lstrip('@') != 'd':
+        view = memoryview(array('d', view.tolist()))
+      target[offset:offset + len(view)] = view
+      offset += len(view)
+      dataset._stats.add_many(view)
+    target.release()
+    dataset._data = storage
+    return dataset
+
+  def _writable(self):
+    # Buffer that new values are appended to. Storage mapped by
+    # load(mmap=True) is read-only, so it is copied on the first write.
+    if isinstance(self._sorted, memoryview):
+      self._sorted = _array_from_view(self._sorted)
+    if isinstance(self._data, memoryview):
+      self._data = _array_from_view(self._data)
+    return self._data
+
+  def _values(self):
+    # Every value in insertion order
+    return self._data
 
   def join(self, other_set):
-    self._data += other_set._data
+    values = other_set._data
+    if self._compact and isinstance(values, memoryview):
+      values = _array_from_view(values)
+    elif self._compact and not (isinstance(values, array) and values.typecode == 'd'):
+      # array.extend() stops part way on a value it cannot convert, so
+      # convert the whole set before touching the storage
+      values = array('d', values)
+    self._writable().extend(values)
+    self._stats.merge(other_set._stats)
+    if other_set._sorted is not None:
+      self._extend_index(other_set._sorted)
+    else:
+      self._extend_index(other_set._data)
+    if self._frequency is not None:
+      if other_set._frequency is not None:
+        self._count_values(other_set._data, other_set._frequency)
+      else:
+        self._count_values(other_set._data)
 
-  def sum(self):
-    """Returns the sum of all values in the dataset.
-    If the dataset is empty, returns 0."""
-    total = 0
+  def _count_values(self, values, counts=None):
+    # Adds values (already appended to _data) to the frequency table.
+    # counts may hold their frequencies already, in first-seen order.
+    if counts is None:
+      counts = Counter(values)
+    for value, added in counts.items():
+      self._count_value(value, added)
+
+  def _count_value(self, value, added=1):
+    # Adds one value, seen added more times, to the frequency table
+    self._frequency[value] += added
+    count = self._frequency[value]
+    if count == added and self._first_seen is not None:
+      self._first_seen[value] = len(self._first_seen)
+    if count > self._max_count:
+      self._max_count = count
+      self._modes = {value}
+    elif count == self._max_count and self._modes is not None:
+      self._modes.add(value)
+
+  def _build_frequency(self):
+    # Counting and finding the highest count both run at C speed; the
+    # modes themselves are picked out by mode() only when it needs them
+    self._frequency = Counter(self._values())
+    self._max_count = max(self._frequency.values(), default=0)
+    self._modes = None
+    self._first_seen = None
+
+  def _extend_index(self, values):
+    if self._sorted is None or len(values) == 0:
+      return
+    numbers, nans = _split_nans(values)
+    end = len(self._sorted) - self._sorted_nans
+    if len(numbers) <= INDEX_INSORT_MAX:
+      # Each insort moves the tail of the index once, which beats
+      # copying the whole index for a handful of values
+      for value in numbers:
+        insort(self._sorted, value, 0, end)
+        end += 1
+    else:
+      self._sorted = _merge_into_index(self._sorted, end, sorted(numbers))
+    self._sorted.extend(nans)
+    self._sorted_nans += len(nans)
+
+  @profiling.timed('dataset.build_index')
+  def build_index(self):
+    """Builds the sorted index used by median(), quantile() and window().
+    Once built, the index is maintained on every insert, so order
+    statistics cost O(1) and window() costs O(log n)."""
+    if self._sorted is None:
+      numbers, nans = _split_nans(self._values())
+      ordered = sorted(numbers)
+      ordered.extend(nans)
+      self._sorted = array('d', ordered) if self._compact else ordered
+      self._sorted_nans = len(nans)
+    return self._sorted
+
+  def save(self, path, index=False):
+    """Writes the dataset to path in a compact binary format: a header
+    holding the running aggregates, then the values as raw little-endian
+    float64s. If index is True the sorted index is stored as well, so
+    median and quantiles are instant after load()."""
+    stats = self._stats
+    flags = FLAG_SORTED if index else 0
+    header = FILE_HEADER.pack(
+      FILE_MAGIC, FILE_VERSION, flags, stats.count,
+      stats._total, stats._compensation,
+      math.nan if stats._min is None else stats._min,
+      math.nan if stats._max is None else stats._max,
+      stats._mean, stats._m2)
+    # Write to a temporary file and move it into place, so saving a set
+    # loaded with mmap=True back to its own path never truncates the
+    # file its values are still mapped from. mkstemp names it uniquely,
+    # so concurrent saves from other threads or processes never share it.
+    fd, temporary = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+      with os.fdopen(fd, 'wb') as file:
+        file.write(header)
+        _write_float64(file, self._values())
+        if index:
+          _write_float64(file, self.build_index())
+      os.replace(temporary, path)
+    except BaseException:
+      if os.path.exists(temporary):
+        os.remove(temporary)
+      raise
+
+  @classmethod
+  def load(cls, path, mmap=False):
+    """Reads a dataset written by save(). The result uses compact storage
+    and its aggregates come from the header, so sum/mean/min/max need no
+    pass over the values. With mmap=True the values (and any stored
+    index) are memory-mapped instead of read, so even very large files
+    open immediately; they are copied into memory on the first insert."""
+    with open(path, 'rb') as file:
+      header = file.read(FILE_HEADER.size)
+      if len(header) < FILE_HEADER.size or header[:4] != FILE_MAGIC:
+        raise ValueError(f"Not a DataSet file: {path}")
+      magic, version, flags, count, total, compensation, low, high, mean, m2 = \
+        FILE_HEADER.unpack(header)
+      if version != FILE_VERSION:
+        raise ValueError(f"Unsupported DataSet file version {version}: {path}")
+      block_count = 2 if flags & FLAG_SORTED else 1
+      size = FILE_HEADER.size + block_count * count * 8
+      if os.fstat(file.fileno()).st_size < size:
+        raise ValueError(f"Truncated DataSet file: {path}")
+
+      if mmap and count and sys.byteorder == 'little':
+        mapped = _mmap.mmap(file.fileno(), size, access=_mmap.ACCESS_READ)
+        view = memoryview(mapped)[FILE_HEADER.size:].cast('d')
+        blocks = [view[i * count:(i + 1) * count] for i in range(block_count)]
+      else:
+        blocks = []
+        for _ in range(block_count):
+          block = array('d')
+          block.fromfile(file, count)
+          if sys.byteorder == 'big':
+            block.byteswap()
+          blocks.append(block)
 
-    for data_point in self._data:
-      total += data_point
+    dataset = cls(compact=True)
+    dataset._data = blocks[0]
+    if flags & FLAG_SORTED:
+      dataset._sorted = blocks[1]
+      dataset._sorted_nans = _trailing_nans(blocks[1])
+    stats = dataset._stats
+    stats.count = count
+    stats._total, stats._compensation = total, compensation
+    stats._mean, stats._m2 = mean, m2
+    if count:
+      stats._min, stats._max = low, high
+    return dataset
 
-    return total
+  @profiling.timed('dataset.sum')
+  def sum(self):
+    """Returns the sum of all values in the dataset.
+    If the dataset is empty, returns 0.
+    Maintained incrementally, so this is O(1)."""
+    return self._stats.sum()
   
+  @profiling.timed('dataset.mean')
   def mean(self):
     """Returns the arithmetic mean of all values in the dataset.
     If the dataset is empty, returns 0."""
-    number_of_data_points = len(self._data)
-
-    if number_of_data_points == 0:
-      return 0
-    
-    return self.sum() / number_of_data_points
+    return self._stats.mean()
   
+  @profiling.timed('dataset.mode')
   def mode(self):
     """Returns the mode(s) of the dataset.
     If the dataset is empty, returns an empty list.
     If there are multiple modes, returns all of them in a list.
-    Returns a single value if there is only one mode."""
-    if len(self._data) == 0:
+    Returns a single value if there is only one mode.
+    The frequency table is built on the first call and maintained by
+    every insert after that, so later calls cost O(1) for a single mode
+    and a sort of the modes alone for several."""
+    if self._stats.count == 0:
       return []
-      
-    # Count frequency of each value
-    frequency = {}
-    for value in self._data:
-      frequency[value] = frequency.get(value, 0) + 1
-    
-    # Find the highest frequency
-    max_frequency = max(frequency.values())
-    
-    # Get all values that appear max_frequency times
-    modes = [value for value, count in frequency.items() 
-            if count == max_frequency]
+    if self._frequency is None:
+      self._build_frequency()
     
     # Return single value if only one mode or all values have same frequency
-    # otherwise return list of modes
-    if len(modes) == 1 or len(modes) == len(self._data):
-        return sorted(modes)[0]
-    return modes
+    # otherwise return list of modes (in order of first appearance)
+    if self._max_count == 1:
+      # Every value is unique, so the smallest is the running minimum
+      return self._stats.min()
+    if self._modes is None:
+      self._modes = set(compress(self._frequency, map(
+        operator.eq, self._frequency.values(), repeat(self._max_count))))
+    if len(self._modes) == 1:
+      return next(iter(self._modes))
+    if self._first_seen is None:
+      self._first_seen = dict(zip(self._frequency, count()))
+    return sorted(self._modes, key=self._first_seen.__getitem__)
   
+  @profiling.timed('dataset.median')
   def median(self):
     """Returns the median value of the dataset.
     If the dataset is empty, returns 0.
     For even number of values, returns average of two middle values."""
-    if len(self._data) == 0:
+    if self._stats.count == 0:
       return 0
       
-    sorted_data = sorted(self._data)
+    sorted_data = self.build_index()
     mid = len(sorted_data) // 2
     
     if len(sorted_data) % 2 == 0:
@@ -76,61 +629,440 @@ class DataSet:
     else:
       # Odd number of values - return middle value
       return sorted_data[mid]
+
+  @profiling.timed('dataset.quantile')
+  def quantile(self, q):
+    """Returns the q-th quantile of the dataset, 0 <= q <= 1.
+    Interpolates linearly between the two nearest values.
+    If the dataset is empty, returns 0."""
+    if not 0 <= q <= 1:
+      raise ValueError("Quantile must be between 0 and 1")
+    if self._stats.count == 0:
+      return 0
+
+    sorted_data = self.build_index()
+    position = q * (len(sorted_data) - 1)
+    lower = int(position)
+    fraction = position - lower
+    if fraction == 0:
+      return sorted_data[lower]
+    return sorted_data[lower] + (sorted_data[lower+1] - sorted_data[lower]) * fraction
+
+  @profiling.timed('dataset.percentile')
+  def percentile(self, p):
+    """Returns the p-th percentile of the dataset, 0 <= p <= 100.
+    If the dataset is empty, returns 0."""
+    if not 0 <= p <= 100:
+      raise ValueError("Percentile must be between 0 and 100")
+    return self.quantile(p / 100)
     
+  @profiling.timed('dataset.max')
   def max(self):
     """Returns the maximum value in the dataset.
     If the dataset is empty, returns 0."""
-    if len(self._data) == 0:
-      return 0
-    return max(self._data)
+    return self._stats.max()
     
+  @profiling.timed('dataset.min')
   def min(self):
     """Returns the minimum value in the dataset.
     If the dataset is empty, returns 0."""
-    if len(self._data) == 0:
-      return 0
-    return min(self._data)
+    return self._stats.min()
     
+  @profiling.timed('dataset.range')
   def range(self):
     """Returns a tuple of (min, max) values in the dataset.
     If the dataset is empty, returns (0, 0)."""
-    if len(self._data) == 0:
-      return (0, 0)
-    return (min(self._data), max(self._data))
+    return (self._stats.min(), self._stats.max())
     
+  @profiling.timed('dataset.variance')
+  def variance(self):
+    """Returns the population variance of the dataset.
+    If the dataset is empty, returns 0.
+    Maintained incrementally, so this is O(1)."""
+    return self._stats.variance()
+
+  @profiling.timed('dataset.stddev')
+  def stddev(self):
+    """Returns the population standard deviation of the dataset.
+    If the dataset is empty, returns 0."""
+    return math.sqrt(self._stats.variance())
+
+  @profiling.timed('dataset.describe')
+  def describe(self, quantiles=(0.25, 0.5, 0.75)):
+    """Returns count, sum, mean, variance, stddev, min, max, median, mode
+    and the requested quantiles in one DataSetSummary.
+    Count, sum, mean, variance, min and max come from the running
+    aggregates; median and quantiles share one sorted index and mode
+    takes one counting pass, so the data is traversed at most twice.
+    quantiles is a dict mapping each requested q to its value."""
+    return DataSetSummary(
+      count=self._stats.count,
+      sum=self.sum(),
+      mean=self.mean(),
+      variance=self.variance(),
+      stddev=self.stddev(),
+      min=self.min(),
+      max=self.max(),
+      median=self.median(),
+      mode=self.mode(),
+      quantiles={q: self.quantile(q) for q in quantiles})
+
+  @profiling.timed('dataset.window')
   def window(self, lower_bound, upper_bound):
     """Returns count of values that lie within the bounds (inclusive).
     Args:
         lower_bound: Lower boundary of the window
         upper_bound: Upper boundary of the window
     Returns:
-        int: Number of values within the window bounds"""
-    return sum(1 for x in self._data if lower_bound <= x <= upper_bound)
+        int: Number of values within the window bounds
+    Uses the sorted index (O(log n)) if it has been built. Otherwise
+    compact storage is counted with one vectorized NumPy reduction when
+    NumPy is installed, and anything else with a scan of the values."""
+    if self._sorted is not None:
+      end = len(self._sorted) - self._sorted_nans
+      count = (bisect_right(self._sorted, upper_bound, 0, end)
+               - bisect_left(self._sorted, lower_bound, 0, end))
+      return max(count, 0)
+    values = self._values()
+    numpy = _numpy()
+    if (numpy is not None and isinstance(values, (array, memoryview))
+        and _is_float64(lower_bound) and _is_float64(upper_bound)):
+      block = numpy.frombuffer(values, dtype=numpy.float64)
+      return int(numpy.count_nonzero((block >= lower_bound) & (block <= upper_bound)))
+    return sum(1 for x in values if lower_bound <= x <= upper_bound)
+
+  @profiling.timed('dataset.window_many')
+  def window_many(self, bounds):
+    """Returns window(lower_bound, upper_bound) for every pair in bounds,
+    as a list in the same order.
+    The sorted index is built once and each range then costs two binary
+    searches, so k ranges take O(n log n + k log n) instead of k scans."""
+    bounds = list(bounds)
+    if self._stats.count == 0:
+      return [0] * len(bounds)
+    sorted_data = self.build_index()
+    end = len(sorted_data) - self._sorted_nans
+    starts = map(bisect_left, repeat(sorted_data), (lower for lower, _ in bounds),
+                 repeat(0), repeat(end))
+    ends = map(bisect_right, repeat(sorted_data), (upper for _, upper in bounds),
+               repeat(0), repeat(end))
+    return [max(end - start, 0) for start, end in zip(starts, ends)]
+
+  @profiling.timed('dataset.histogram')
+  def histogram(self, edges):
+    """Returns the number of values in each bin between consecutive edges.
+    Bins are half-open, [edges[i], edges[i+1]), except the last, which
+    includes its upper edge too (the numpy.histogram convention). Values
+    outside [edges[0], edges[-1]] are not counted.
+    Uses the sorted index: one binary search per edge."""
+    edges = list(edges)
+    if len(edges) < 2:
+      raise ValueError("Histogram needs at least two edges")
+    if any(map(operator.gt, edges, edges[1:])):
+      raise ValueError("Histogram edges must not decrease")
+    if self._stats.count == 0:
+      return [0] * (len(edges) - 1)
+    sorted_data = self.build_index()
+    end = len(sorted_data) - self._sorted_nans
+    positions = list(map(bisect_left, repeat(sorted_data), edges, repeat(0), repeat(end)))
+    positions[-1] = bisect_right(sorted_data, edges[-1], 0, end)
+    return list(map(operator.sub, positions[1:], positions))
     
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Read numeric data from URL into a DataSet')
-    parser.add_argument('--url', help='URL to scrape for numbers', required=True)
+    parser = argparse.ArgumentParser(description='Read numeric data from a file or URL into a DataSet')
+    parser.add_argument('source', nargs='?', help='File (.csv, .arrow, .parquet, .dset) or URL to read numbers from')
+    parser.add_argument('--url', help='URL to scrape for numbers')
+    parser.add_argument('--column', help='Name or index of the column to read from Arrow and Parquet files')
+    parser.add_argument('--output', help='Also write the values to this file (.arrow, .parquet or .dset)')
+    parser.add_argument('--cache', action='store_true', help='Reuse parsed pages, revalidating with the server')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory for the page cache')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_MB, help='Maximum size of the page cache in MB')
+    parser.add_argument('--profile', nargs='?', const='text', choices=('text', 'json', 'prometheus'),
+                        help='Time each stage of reading and summarising and print a report')
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+    source = args.source or args.url
+    if not source:
+        parser.error('a source file or --url is required')
+    
+    # Imported here because readers imports this module
+    from readers import get_reader, reader_format, writer_for
     
     try:
-        reader = DataSetReaderWeb()
-        dataset = reader.parse(args.url)
+        name = reader_format(source)
+        options = {}
+        if name == 'web' and args.cache:
+            options['cache'] = WebCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        if name in ('arrow', 'parquet') and args.column is not None:
+            options['column'] = int(args.column) if args.column.isdigit() else args.column
+        dataset = get_reader(name, **options).parse(source)
+        if args.output:
+            writer_for(args.output).write(dataset, args.output)
+        summary = dataset.describe()
             
-        print(f"Successfully loaded {len(dataset._data)} values")
-        print(f"Sum: {dataset.sum()}")
-        print(f"Mean: {dataset.mean()}")
-        print(f"Median: {dataset.median()}")
-        print(f"Mode: {dataset.mode()}")
-        print(f"Range: {dataset.range()}")
-    except (FileNotFoundError, ValueError) as e:
+        print(f"Successfully loaded {summary.count} values")
+        print(f"Sum: {summary.sum}")
+        print(f"Mean: {summary.mean}")
+        print(f"Median: {summary.median}")
+        print(f"Mode: {summary.mode}")
+        print(f"Range: {(summary.min, summary.max)}")
+        print(f"Std dev: {summary.stddev}")
+    except (FileNotFoundError, ImportError, ValueError) as e:
         print(f"Error: {str(e)}")
         exit(1)
+    
+    if args.profile == 'text':
+        print(profiling.format_report())
+    elif args.profile == 'json':
+        print(json.dumps(profiling.report(), indent=2))
+    elif args.profile == 'prometheus':
+        print(profiling.prometheus(), end='')
+
+class SegmentedDataSet(DataSet):
+  """DataSet whose join() is O(1).
+  Instead of copying the other set's values, join() keeps a reference
+  to each of its buffers together with the number of values it held at
+  the time. Buffers only ever grow at the end, so that prefix never
+  changes even if the other set keeps taking values. Running
+  aggregates are merged without rescanning, and the sorted index and
+  frequency table are rebuilt from the segments only if asked for.
+  The segments are copied into one buffer only when _data itself is
+  needed."""
+
+  def __init__(self, compact=False):
+    self._segments = []
+    super().__init__(compact)
+
+  @property
+  def _data(self):
+    if self._segments:
+      self.compact_segments()
+    return self._tail
+
+  @_data.setter
+  def _data(self, storage):
+    self._segments = []
+    self._tail = storage
+
+  def _writable(self):
+    if isinstance(self._sorted, memoryview):
+      self._sorted = _array_from_view(self._sorted)
+    if isinstance(self._tail, memoryview):
+      self._tail = _array_from_view(self._tail)
+    return self._tail
+
+  def _values(self):
+    if not self._segments:
+      return self._tail
+    return chain(*(islice(buffer, length) for buffer, length in self._segments), self._tail)
+
+  def _segments_of(self, other_set):
+    # (buffer, length) snapshots covering every value of other_set
+    if isinstance(other_set, SegmentedDataSet):
+      segments = list(other_set._segments)
+      tail = other_set._tail
+    else:
+      segments = []
+      tail = other_set._data
+    if len(tail):
+      segments.append((tail, len(tail)))
+    return segments
+
+  def join(self, other_set):
+    if len(self._tail):
+      # Freeze our own buffer so later values land after the joined ones
+      self._segments.append((self._tail, len(self._tail)))
+      self._tail = array('d') if self._compact else list()
+    self._segments.extend(self._segments_of(other_set))
+    self._stats.merge(other_set._stats)
+    self._sorted = None
+    if self._frequency is not None:
+      if other_set._frequency is not None:
+        self._count_values((), other_set._frequency)
+      else:
+        self._frequency = None
+
+  @property
+  def segment_count(self):
+    """Number of buffers the values are currently spread over."""
+    return len(self._segments) + (1 if len(self._tail) else 0)
+
+  def compact_segments(self):
+    """Copies every segment into a single buffer owned by this set."""
+    values = self._values()
+    self._data = array('d', values) if self._compact else list(values)
+
+CacheEntry = namedtuple('CacheEntry', ['etag', 'last_modified', 'values'])
+
+class WebCache:
+    """On-disk LRU cache of the numeric values parsed from web pages.
+    
+    Each URL is stored as one file holding its ETag/Last-Modified
+    validators and its parsed values as raw float64s, so a page that has
+    not changed never needs to be downloaded or parsed again. Reading an
+    entry refreshes its modification time; when the cache grows past
+    max_bytes the least recently used entries are deleted."""
+    
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + '.cache')
+    
+    def get(self, url):
+        """Return the CacheEntry stored for url, or None."""
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                values = array('d')
+                values.frombytes(f.read())
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        if header.get('url') != url:
+            return None
+        return CacheEntry(header.get('etag'), header.get('last_modified'), values)
+    
+    def put(self, url, etag, last_modified, values):
+        """Store the parsed values of url with the response validators."""
+        path = self._path(url)
+        header = {'url': url, 'etag': etag, 'last_modified': last_modified}
+        # A uniquely named temporary file, so concurrent writers (threads
+        # or processes) never share one, removed again if writing fails
+        fd, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                f.write(array('d', values).tobytes())
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self._evict()
+    
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.cache'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+class HtmlNumberParser(HTMLParser):
+    """Single-pass extractor for the numeric text nodes of an HTML page.
+    
+    Accepts and rejects exactly what BeautifulSoup's stripped_strings plus
+    float() does, but never builds a tree: only the stack of open tag names
+    is kept. Text can be fed in pieces with feed(); the numbers found so
+    far are collected in self.values.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.values = []
+        self._text = []
+        self._open_tags = []
+        self._hidden = 0
+    
+    def _flush(self):
+        # Consecutive pieces of text form one string, as in BeautifulSoup
+        if not self._text:
+            return
+        text = ''.join(self._text).strip()
+        self._text = []
+        if text and not self._hidden:
+            self._add(text)
+    
+    def _add(self, text):
+        try:
+            self.values.append(float(text))
+        except ValueError:
+            pass
+    
+    def handle_data(self, data):
+        self._text.append(data)
+    
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_TAGS:
+            return
+        self._open_tags.append(tag)
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden += 1
+    
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+    
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag not in self._open_tags:
+            return
+        # Closing a tag also closes anything left open inside it
+        while True:
+            closed = self._open_tags.pop()
+            if closed in HIDDEN_TEXT_TAGS:
+                self._hidden -= 1
+            if closed == tag:
+                break
+    
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith('CDATA['):
+            # CDATA sections are reported even inside hidden tags
+            text = data[len('CDATA['):].strip()
+            if text:
+                self._add(text)
+    
+    def handle_comment(self, data):
+        self._flush()
+    
+    def handle_decl(self, decl):
+        self._flush()
+    
+    def handle_pi(self, data):
+        self._flush()
+    
+    def close(self):
+        super().close()
+        self._flush()
 
 class DataSetReaderWeb:
     """Reads numeric data from web pages into DataSet objects"""
     
+    def __init__(self, cache=None, engine='soup'):
+        """Create a reader.
+        
+        Args:
+            cache: Optional WebCache. Cached pages are revalidated with a
+                conditional GET and a 304 reuses the stored values.
+            engine: 'soup' builds a BeautifulSoup tree; 'stream' uses the
+                faster single-pass HtmlNumberParser. Both find the same values.
+        """
+        if engine not in WEB_ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {WEB_ENGINES}")
+        self.cache = cache
+        self.engine = engine
+    
     def parse(self, url):
         """Parse webpage and return a DataSet containing any numeric values found.
         
@@ -145,30 +1077,201 @@ class DataSetReaderWeb:
             ValueError: If no numeric values are found
         """
         try:
-            response = requests.get(url)
-            response.raise_for_status()
+            with profiling.stage('web.parse'):
+                response, entry = self._request(requests.get, url)
+                return self._dataset_from_response(response, entry, url)
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+        except requests.RequestException as e:
+            raise ValueError(f"Failed to fetch URL {url}: {str(e)}")
+
+    def parse_stream(self, url, dataset=None, max_bytes=None, chunk_size=STREAM_CHUNK_SIZE):
+        """Download and parse a webpage incrementally.
+        
+        The body is read chunk by chunk, decoded incrementally and fed to an
+        HtmlNumberParser, and the numbers found in each chunk are added to
+        the dataset straight away. The whole page is never held in memory.
+        
+        Args:
+            url: URL of webpage to parse
+            dataset: DataSet to add values to as they arrive (a new one if None)
+            max_bytes: Abort if the body is larger than this many bytes
+            chunk_size: Bytes read from the connection at a time
             
-            # Find all text nodes
-            texts = soup.stripped_strings
+        Returns:
+            DataSet: The dataset the values were added to
             
+        Raises:
+            ValueError: If URL is invalid or connection fails
+            ValueError: If the body is larger than max_bytes
+            ValueError: If no numeric values are found
+        """
+        if dataset is None:
             dataset = DataSet()
-            for text in texts:
-                # Try to convert any numeric strings to float
-                try:
-                    num = float(text.strip())
-                    dataset.include(num)
-                except ValueError:
-                    continue
-                    
-            if len(dataset._data) == 0:
-                raise ValueError(f"No numeric values found at URL: {url}")
+        found = 0
+        received = 0
+        parser = HtmlNumberParser()
+        try:
+            with requests.get(url, stream=True) as response:
+                response.raise_for_status()
+                decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+                for chunk in response.iter_content(chunk_size):
+                    received += len(chunk)
+                    if max_bytes is not None and received > max_bytes:
+                        raise ValueError(f"Response from URL {url} is larger than {max_bytes} bytes")
+                    parser.feed(decoder.decode(chunk))
+                    found += self._drain(parser, dataset)
+                parser.feed(decoder.decode(b'', final=True))
+                parser.close()
+                found += self._drain(parser, dataset)
                 
-            return dataset
-            
         except requests.RequestException as e:
             raise ValueError(f"Failed to fetch URL {url}: {str(e)}")
+            
+        if found == 0:
+            raise ValueError(f"No numeric values found at URL: {url}")
+        return dataset
+
+    def _drain(self, parser, dataset):
+        """Move the values parsed so far into dataset, returning how many."""
+        values = parser.values
+        if values:
+            parser.values = []
+            dataset.include_many(values)
+        return len(values)
+
+    def parse_many(self, urls, concurrency=8, per_host=4, timeout=10,
+                   retries=3, backoff=0.5, merge=False):
+        """Fetch and parse many webpages concurrently.
+        
+        Pages are fetched by a pool of threads sharing one requests.Session,
+        so connections (and TLS sessions) are reused. At most per_host
+        requests run against any single host at a time. Connection errors,
+        timeouts, 429 and 5xx responses are retried with exponential backoff.
+        
+        Args:
+            urls: URLs of webpages to parse
+            concurrency: Maximum number of requests in flight
+            per_host: Maximum number of requests in flight per host
+            timeout: Seconds to wait for each response
+            retries: Number of retries after the first attempt
+            backoff: Delay before the first retry, doubled for each retry after
+            merge: Return one joined DataSet instead of one per URL
+            
+        Returns:
+            tuple: (datasets, failures). datasets is a list with one DataSet
+            per URL (None where it failed), or a single merged DataSet if
+            merge is True. failures maps each failed URL to its error message.
+        """
+        urls = list(urls)
+        host_limits = {urlsplit(url).netloc: threading.BoundedSemaphore(per_host)
+                       for url in urls}
+        
+        def fetch(url):
+            with host_limits[urlsplit(url).netloc]:
+                return self._fetch(session, url, timeout, retries, backoff)
+        
+        with requests.Session() as session:
+            adapter = requests.adapters.HTTPAdapter(pool_connections=len(host_limits) or 1,
+                                                    pool_maxsize=concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [executor.submit(fetch, url) for url in urls]
+                datasets = []
+                failures = {}
+                for url, future in zip(urls, futures):
+                    try:
+                        datasets.append(future.result())
+                    except ValueError as e:
+                        datasets.append(None)
+                        failures[url] = str(e)
+        
+        if merge:
+            merged = DataSet()
+            for dataset in datasets:
+                if dataset is not None:
+                    merged.join(dataset)
+            return merged, failures
+        return datasets, failures
+
+    def _fetch(self, session, url, timeout, retries, backoff):
+        """Fetch and parse one URL through session, retrying transient errors."""
+        for attempt in range(retries + 1):
+            try:
+                response, entry = self._request(session.get, url, timeout=timeout)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return self._dataset_from_response(response, entry, url)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries:
+                    raise ValueError(f"Failed to fetch URL {url}: {str(e)}")
+            except requests.RequestException as e:
+                raise ValueError(f"Failed to fetch URL {url}: {str(e)}")
+            time.sleep(backoff * 2 ** attempt)
+
+    def _request(self, get, url, **kwargs):
+        """GET url, conditionally if the cache holds an entry for it."""
+        entry = self.cache.get(url) if self.cache is not None else None
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        with profiling.stage('web.fetch') as timer:
+            response = get(url, headers=headers, **kwargs)
+            timer.bytes = len(response.content)
+        return response, entry
+
+    def _dataset_from_response(self, response, entry, url):
+        """Build a DataSet from a response, reusing the cache on a 304."""
+        if entry is not None and response.status_code == 304:
+            dataset = DataSet()
+            dataset.include_many(entry.values)
+            return dataset
+        response.raise_for_status()
+        dataset = self._parse_html(response.text, url)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if self.cache is not None and (etag or last_modified):
+            self.cache.put(url, etag, last_modified, dataset._data)
+        return dataset
+
+    def _parse_html(self, html, url):
+        """Return a DataSet of the numeric text nodes in an HTML document."""
+        dataset = DataSet()
+        dataset.include_many(self._extract_values(html))
+        if len(dataset._data) == 0:
+            raise ValueError(f"No numeric values found at URL: {url}")
+            
+        return dataset
+
+    def _extract_values(self, html):
+        """Return the numeric text nodes of an HTML document as floats."""
+        with profiling.stage('web.extract.' + self.engine) as timer:
+            values = self._extract_with_engine(html)
+            timer.items = len(values)
+        return values
+
+    def _extract_with_engine(self, html):
+        if self.engine == 'stream':
+            parser = HtmlNumberParser()
+            parser.feed(html)
+            parser.close()
+            return parser.values
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Find all text nodes
+        texts = soup.stripped_strings
+        
+        values = []
+        for text in texts:
+            # Try to convert any numeric strings to float
+            try:
+                values.append(float(text.strip()))
+            except ValueError:
+                continue
+        return values
 
 if __name__ == "__main__":
     main()
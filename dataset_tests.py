@@ -1,6 +1,11 @@
 import pytest
 import os
-from dataset import DataSet, DataSetReaderWeb
+import random
+import threading
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import dataset as dataset_module
+from dataset import DataSet, DataSetReaderWeb, HtmlNumberParser, SegmentedDataSet, WebCache
 
 # Tests for DataSet constructor
 
@@ -41,6 +46,179 @@ def test_include_invalid_type():
     with pytest.raises(TypeError):
         dataset.include("not a number")
 
+# Tests for DataSet: compact storage
+
+def test_compact_dataset_stores_values_in_array():
+    # Arrange
+    dataset = DataSet(compact=True)
+    
+    # Act
+    dataset.include(5)
+    dataset.include(-2.5)
+    
+    # Assert
+    assert isinstance(dataset._data, array)
+    assert list(dataset._data) == [5.0, -2.5]
+
+def test_compact_dataset_statistics_match_list_dataset():
+    # Arrange
+    values = [4, -1, 7, 7, 2.5, 0]
+    compact = DataSet(compact=True)
+    boxed = DataSet()
+    for value in values:
+        compact.include(value)
+        boxed.include(value)
+    
+    # Assert
+    assert compact.sum() == boxed.sum()
+    assert compact.mean() == boxed.mean()
+    assert compact.median() == boxed.median()
+    assert compact.mode() == boxed.mode()
+    assert compact.range() == boxed.range()
+    assert compact.window(0, 5) == boxed.window(0, 5)
+
+def test_compact_dataset_empty_semantics():
+    # Arrange
+    dataset = DataSet(compact=True)
+    
+    # Assert
+    assert dataset.sum() == 0
+    assert dataset.mean() == 0
+    assert dataset.median() == 0
+    assert dataset.mode() == []
+    assert dataset.range() == (0, 0)
+    assert dataset.window(0, 10) == 0
+
+def test_join_list_dataset_with_compact_dataset():
+    # Arrange
+    dataset1 = DataSet(compact=True)
+    dataset1.include(1)
+    dataset2 = DataSet()
+    dataset2.include(2)
+    
+    # Act
+    dataset1.join(dataset2)
+    
+    # Assert
+    assert list(dataset1._data) == [1.0, 2.0]
+
+# Tests for DataSet: include_many / from_buffer
+
+def test_include_many_adds_iterable_in_order():
+    # Arrange
+    dataset = DataSet()
+    dataset.include(1)
+    
+    # Act
+    dataset.include_many(x for x in [2, 3.5, -4])
+    
+    # Assert
+    assert dataset._data == [1, 2, 3.5, -4]
+
+def test_include_many_accepts_array_and_memoryview():
+    # Arrange
+    dataset = DataSet()
+    
+    # Act
+    dataset.include_many(array('d', [1.5, 2.5]))
+    dataset.include_many(memoryview(array('i', [3, 4])))
+    
+    # Assert
+    assert dataset._data == [1.5, 2.5, 3, 4]
+
+def test_include_many_invalid_value_leaves_dataset_unchanged():
+    # Arrange
+    dataset = DataSet()
+    dataset.include(1)
+    
+    # Act & Assert
+    with pytest.raises(TypeError):
+        dataset.include_many([2, "not a number", 3])
+    assert dataset._data == [1]
+
+def test_include_many_rejects_non_numeric_buffer():
+    # Arrange
+    dataset = DataSet(compact=True)
+    
+    # Act & Assert
+    with pytest.raises(TypeError):
+        dataset.include_many(array('u', 'abc'))
+    assert len(dataset._data) == 0
+
+def test_include_int_too_large_for_float():
+    # Arrange
+    dataset = DataSet()
+    dataset.include(1.5)
+    
+    # Act
+    dataset.include(10**400)
+    dataset.include_many([2, 10**400])
+    
+    # Assert
+    assert dataset._data == [1.5, 10**400, 2, 10**400]
+    assert dataset._stats.count == 4
+    assert dataset.sum() == float('inf')
+    assert dataset.max() == 10**400
+
+def test_compact_include_int_too_large_leaves_dataset_unchanged():
+    # Arrange
+    dataset = DataSet(compact=True)
+    dataset.include(1)
+    
+    # Act & Assert
+    with pytest.raises(OverflowError):
+        dataset.include(10**400)
+    with pytest.raises(OverflowError):
+        dataset.include_many([2, 10**400])
+    assert list(dataset._data) == [1]
+    assert dataset._stats.count == 1
+    assert dataset.sum() == 1
+
+def test_include_many_rejects_bytes():
+    # Arrange
+    dataset = DataSet()
+    
+    # Act & Assert
+    for data in (b"1,2", bytearray(b"1,2"), memoryview(b"1,2")):
+        with pytest.raises(TypeError):
+            dataset.include_many(data)
+    with pytest.raises(TypeError):
+        DataSet.concat([b"1,2"])
+    dataset.include_many(array('B', b"1,2"))
+    assert dataset._data == [49, 44, 50]
+
+def test_compact_join_int_too_large_leaves_dataset_unchanged():
+    # Arrange
+    dataset = DataSet(compact=True)
+    dataset.include(1)
+    other = DataSet()
+    other.include_many([2, 10**400])
+    
+    # Act & Assert
+    with pytest.raises(OverflowError):
+        dataset.join(other)
+    assert list(dataset._data) == [1]
+    assert dataset._stats.count == 1
+
+def test_from_buffer_builds_compact_dataset():
+    # Act
+    dataset = DataSet.from_buffer(array('d', [3.0, 1.0, 2.0]))
+    
+    # Assert
+    assert isinstance(dataset._data, array)
+    assert list(dataset._data) == [3.0, 1.0, 2.0]
+    assert dataset.median() == 2.0
+
+def test_concat_preserves_buffer_order():
+    # Act
+    dataset = DataSet.concat([array('d', [1.0, 2.0]), array('i', [3]), array('d')])
+    
+    # Assert
+    assert isinstance(dataset._data, array)
+    assert list(dataset._data) == [1.0, 2.0, 3.0]
+    assert dataset.sum() == 6.0
+    assert dataset.range() == (1.0, 3.0)
+
 # Tests for DataSet: Join function
 
 def test_join_two_datasets():
@@ -59,6 +237,203 @@ def test_join_two_datasets():
     # Assert
     assert dataset1._data == [1, 2, 3, 4]
 
+# Tests for SegmentedDataSet: lazy join
+
+def test_segmented_join_does_not_copy():
+    # Arrange
+    dataset = SegmentedDataSet()
+    shards = []
+    for start in range(0, 30, 10):
+        shard = DataSet()
+        shard.include_many(range(start, start + 10))
+        shards.append(shard)
+    
+    # Act
+    for shard in shards:
+        dataset.join(shard)
+    
+    # Assert
+    assert dataset.segment_count == 3
+    assert dataset.sum() == sum(range(30))
+    assert dataset.mean() == 14.5
+    assert dataset.range() == (0, 29)
+    assert dataset.median() == 14.5
+    assert dataset.window(5, 12) == 8
+    assert dataset.segment_count == 3  # Statistics did not compact
+
+def test_segmented_join_snapshots_other_set():
+    # Arrange
+    dataset = SegmentedDataSet()
+    dataset.include(1)
+    other = SegmentedDataSet(compact=True)
+    other.include_many([2, 3])
+    
+    # Act
+    dataset.join(other)
+    other.include(100)
+    dataset.include(4)
+    
+    # Assert
+    assert list(dataset._values()) == [1, 2, 3, 4]
+    assert dataset.mode() == 1
+    assert dataset._data == [1, 2, 3, 4]
+    assert dataset.segment_count == 1
+
+def test_segmented_join_keeps_frequency_table():
+    # Arrange
+    dataset = SegmentedDataSet()
+    dataset.include_many([1, 2, 2])
+    assert dataset.mode() == 2
+    other = DataSet()
+    other.include_many([1, 1])
+    other.mode()
+    
+    # Act
+    dataset.join(other)
+    
+    # Assert
+    assert dataset.mode() == 1
+    assert dataset.segment_count == 2
+
+# Tests for DataSet: save and load
+
+def test_save_load_round_trip(tmp_path):
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([3, 1.5, -2, 1e10, 0.1])
+    path = str(tmp_path / "values.dset")
+    
+    # Act
+    dataset.save(path)
+    loaded = DataSet.load(path)
+    
+    # Assert
+    assert list(loaded._values()) == [3, 1.5, -2, 1e10, 0.1]
+    assert loaded.sum() == dataset.sum()
+    assert loaded.variance() == dataset.variance()
+    assert loaded.range() == dataset.range()
+    assert loaded._sorted is None
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_save_load_with_index(tmp_path, use_mmap):
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([5, 1, 4, 2, 3])
+    path = str(tmp_path / "values.dset")
+    
+    # Act
+    dataset.save(path, index=True)
+    loaded = DataSet.load(path, mmap=use_mmap)
+    
+    # Assert
+    assert list(loaded._sorted) == [1, 2, 3, 4, 5]
+    assert loaded.median() == 3
+    assert loaded.window(2, 4) == 3
+
+def test_load_mmap_copies_on_write(tmp_path):
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([2, 1])
+    path = str(tmp_path / "values.dset")
+    dataset.save(path, index=True)
+    loaded = DataSet.load(path, mmap=True)
+    
+    # Act
+    loaded.include(3)
+    loaded.include_many([0])
+    
+    # Assert
+    assert list(loaded._values()) == [2, 1, 3, 0]
+    assert list(loaded._sorted) == [0, 1, 2, 3]
+    assert loaded.sum() == 6
+    assert list(DataSet.load(path)._values()) == [2, 1]
+
+def test_save_mmap_loaded_set_to_same_path(tmp_path):
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many(range(100000))
+    path = str(tmp_path / "values.dset")
+    dataset.save(path)
+    loaded = DataSet.load(path, mmap=True)
+    
+    # Act
+    loaded.save(path, index=True)
+    
+    # Assert
+    reloaded = DataSet.load(path)
+    assert list(reloaded._values()) == list(range(100000))
+    assert reloaded.median() == 49999.5
+    assert [name for name in os.listdir(tmp_path)] == ["values.dset"]
+
+def test_save_failure_leaves_no_files(tmp_path, monkeypatch):
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([1, 2, 3])
+    def fail(file, values):
+        raise OSError("disk full")
+    monkeypatch.setattr(dataset_module, "_write_float64", fail)
+    
+    # Act
+    with pytest.raises(OSError, match="disk full"):
+        dataset.save(str(tmp_path / "values.dset"))
+    
+    # Assert
+    assert os.listdir(tmp_path) == []
+
+def test_save_load_empty(tmp_path):
+    # Arrange
+    path = str(tmp_path / "empty.dset")
+    
+    # Act
+    DataSet().save(path, index=True)
+    loaded = DataSet.load(path, mmap=True)
+    
+    # Assert
+    assert loaded.sum() == 0
+    assert loaded.range() == (0, 0)
+    assert loaded.median() == 0
+
+def test_load_rejects_other_files(tmp_path):
+    # Arrange
+    path = tmp_path / "values.csv"
+    path.write_text("1,2,3\n")
+    
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        DataSet.load(str(path))
+    assert "Not a DataSet file" in str(exc_info.value)
+
+def test_load_rejects_truncated_file(tmp_path):
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([1, 2, 3])
+    path = tmp_path / "values.dset"
+    dataset.save(str(path))
+    path.write_bytes(path.read_bytes()[:-4])
+    
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        DataSet.load(str(path))
+    assert "Truncated" in str(exc_info.value)
+
+def test_segmented_save_load(tmp_path):
+    # Arrange
+    dataset = SegmentedDataSet()
+    dataset.include_many([1, 2])
+    other = DataSet()
+    other.include_many([3])
+    dataset.join(other)
+    path = str(tmp_path / "values.dset")
+    
+    # Act
+    dataset.save(path)
+    loaded = SegmentedDataSet.load(path, mmap=True)
+    loaded.include(4)
+    
+    # Assert
+    assert list(loaded._values()) == [1, 2, 3, 4]
+    assert loaded.mean() == 2.5
+
 # Tests for DataSet: Sum function
 
 def test_sum_with_negative_values():
@@ -110,6 +485,35 @@ def test_sum_empty_dataset():
     # Assert
     assert result == 0
 
+def test_sum_is_compensated():
+    # Arrange
+    dataset = DataSet()
+    dataset.include(1e16)
+    dataset.include(1.0)
+    dataset.include(-1e16)
+    
+    # Act
+    result = dataset.sum()
+    
+    # Assert
+    assert result == 1.0  # A naive running total loses the 1.0
+
+def test_aggregates_follow_include_many_and_join():
+    # Arrange
+    dataset1 = DataSet()
+    dataset1.include(3)
+    dataset1.include_many([10, -2])
+    dataset2 = DataSet(compact=True)
+    dataset2.include_many(array('d', [20.5, -7.0]))
+    
+    # Act
+    dataset1.join(dataset2)
+    
+    # Assert
+    assert dataset1.sum() == pytest.approx(24.5)
+    assert dataset1.mean() == pytest.approx(4.9)
+    assert dataset1.range() == (-7.0, 20.5)
+
 # Tests for DataSet: Mean function
 
 def test_mean_with_negative_values():
@@ -243,6 +647,62 @@ def test_mode_all_unique_values():
     # Assert
     assert result == 1  # Returns smallest value when all frequencies are equal
 
+def test_mode_lists_modes_in_order_of_first_appearance():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([2, 1, 1, 2, 3])
+    
+    # Act
+    result = dataset.mode()
+    
+    # Assert
+    assert result == [2, 1]
+
+def test_mode_stays_correct_after_include_and_join():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([1, 2, 2])
+    assert dataset.mode() == 2
+    other = DataSet()
+    other.include_many([3, 3, 1])
+    other.mode()
+    
+    # Act & Assert
+    dataset.include(1)
+    assert dataset.mode() == [1, 2]
+    dataset.join(other)
+    assert dataset.mode() == 1
+    dataset.include_many(array('d', [3.0, 5.0]))
+    assert dataset.mode() == [1, 3]
+
+def test_mode_keeps_first_appearance_order_for_new_values():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([4, 9, 4, 9])
+    assert dataset.mode() == [4, 9]
+    
+    # Act
+    for value in [7, 7, 8, 0, 8, 0]:
+        dataset.include(value)
+    dataset.include_many([9, 0, 7, 8, 4, 7, 0])
+    
+    # Assert
+    assert dataset.mode() == [7, 0]
+    dataset.include_many([9, 8])
+    assert dataset.mode() == [9, 7, 8, 0]
+
+def test_mode_all_unique_after_include():
+    # Arrange
+    dataset = DataSet(compact=True)
+    dataset.include_many([5, 3])
+    assert dataset.mode() == 3
+    
+    # Act
+    dataset.include(-1)
+    
+    # Assert
+    assert dataset.mode() == -1
+
 # Tests for DataSet: Median function
 
 def test_median_odd_number_of_values():
@@ -297,6 +757,137 @@ def test_median_unsorted_values():
     # Assert
     assert result == 3
 
+# Tests for DataSet: sorted index, quantile and percentile
+
+def test_median_stays_correct_after_include():
+    # Arrange
+    dataset = DataSet()
+    dataset.include(5)
+    dataset.include(1)
+    dataset.include(3)
+    assert dataset.median() == 3
+    
+    # Act
+    dataset.include(10)
+    dataset.include_many([0, 7])
+    
+    # Assert
+    assert dataset.median() == 4
+    assert dataset._sorted == [0, 1, 3, 5, 7, 10]
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_index_keeps_nans_out_of_range_queries(compact, tmp_path):
+    # Arrange
+    nan = float('nan')
+    dataset = DataSet(compact=compact)
+    dataset.include_many([3, nan, 1, 2, 5, 0])
+    scanned = dataset.window(1, 3)
+    
+    # Act
+    dataset.median()
+    dataset.include(nan)
+    dataset.include(2)
+    dataset.include_many([nan, 4, 1])
+    path = str(tmp_path / "values.dset")
+    dataset.save(path, index=True)
+    loaded = DataSet.load(path, mmap=True)
+    
+    # Assert
+    assert scanned == 3
+    assert list(dataset._sorted[:8]) == [0, 1, 1, 2, 2, 3, 4, 5]
+    assert dataset._sorted_nans == 3
+    for data in (dataset, loaded):
+        assert data.window(1, 3) == 5
+        assert data.window_many([(1, 3), (4, 10)]) == [5, 2]
+        assert data.histogram([0, 2, 5]) == [3, 5]
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_index_merges_batches_in_place_of_resorting(compact, use_numpy, monkeypatch):
+    # Arrange
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(dataset_module, "_numpy_module", False)
+    nan = float('nan')
+    rng = random.Random(3)
+    values = [rng.randint(0, 50) for _ in range(200)]
+    dataset = DataSet(compact=compact)
+    dataset.include_many(values + [nan])
+    dataset.build_index()
+    
+    # Act
+    batches = [[7], [rng.randint(-10, 60) for _ in range(5)],
+               [rng.randint(-10, 60) for _ in range(100)] + [nan], [1.5] * 20]
+    for batch in batches:
+        dataset.include_many(batch)
+        values.extend(value for value in batch if value == value)
+    
+    # Assert
+    assert list(dataset._sorted[:len(values)]) == sorted(values)
+    assert dataset._sorted_nans == 2
+    assert dataset.window(0, 20) == sum(1 for value in values if 0 <= value <= 20)
+
+def test_window_uses_index_with_inclusive_bounds():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([1, 5, 3, 10, 5, -2])
+    scanned = dataset.window(3, 5)
+    
+    # Act
+    dataset.build_index()
+    
+    # Assert
+    assert dataset.window(3, 5) == scanned == 3
+    assert dataset.window(5, 2) == 0
+    with pytest.raises(TypeError):
+        dataset.window("invalid", 5)
+
+def test_index_follows_join():
+    # Arrange
+    dataset1 = DataSet(compact=True)
+    dataset1.include_many([4.0, 2.0])
+    dataset1.build_index()
+    dataset2 = DataSet()
+    dataset2.include_many([3, 1])
+    
+    # Act
+    dataset1.join(dataset2)
+    
+    # Assert
+    assert list(dataset1._sorted) == [1.0, 2.0, 3.0, 4.0]
+    assert dataset1.median() == 2.5
+
+def test_quantile_interpolates():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([4, 1, 3, 2])
+    
+    # Assert
+    assert dataset.quantile(0) == 1
+    assert dataset.quantile(1) == 4
+    assert dataset.quantile(0.5) == 2.5
+    assert dataset.quantile(0.25) == pytest.approx(1.75)
+    assert dataset.percentile(75) == pytest.approx(3.25)
+
+def test_quantile_empty_dataset():
+    # Arrange
+    dataset = DataSet()
+    
+    # Assert
+    assert dataset.quantile(0.5) == 0
+
+def test_quantile_out_of_range():
+    # Arrange
+    dataset = DataSet()
+    dataset.include(1)
+    
+    # Act & Assert
+    with pytest.raises(ValueError):
+        dataset.quantile(1.5)
+    with pytest.raises(ValueError):
+        dataset.percentile(-1)
+
 # Tests for DataSet: Max function
 
 def test_max_with_positive_values():
@@ -413,8 +1004,90 @@ def test_range_empty_dataset():
     assert result == (0, 0)
 
 
+# Tests for DataSet: variance, stddev and describe
+
+def test_variance_matches_statistics_module():
+    # Arrange
+    import statistics
+    values = [2, 4, 4, 4, 5, 5, 7, 9]
+    dataset = DataSet()
+    dataset.include(values[0])
+    dataset.include_many(values[1:5])
+    other = DataSet()
+    other.include_many(values[5:])
+    
+    # Act
+    dataset.join(other)
+    
+    # Assert
+    assert dataset.variance() == pytest.approx(statistics.pvariance(values))
+    assert dataset.stddev() == pytest.approx(2.0)
+
+def test_describe_matches_individual_methods():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([5, 1, 3, 3, 10, -2])
+    
+    # Act
+    summary = dataset.describe(quantiles=(0.1, 0.9))
+    
+    # Assert
+    assert summary.count == 6
+    assert summary.sum == dataset.sum()
+    assert summary.mean == dataset.mean()
+    assert summary.variance == dataset.variance()
+    assert (summary.min, summary.max) == dataset.range()
+    assert summary.median == dataset.median() == 3
+    assert summary.mode == 3
+    assert summary.quantiles == {0.1: dataset.quantile(0.1), 0.9: dataset.quantile(0.9)}
+
+def test_describe_with_deviations_beyond_float_range():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([1e308, 1e308, -1e308])
+    single = DataSet()
+    for value in [1e308, 1e308, -1e308]:
+        single.include(value)
+    
+    # Act
+    summary = dataset.describe()
+    
+    # Assert
+    assert summary.variance == summary.stddev == float('inf')
+    assert single.stddev() == float('inf')
+
+def test_describe_empty_dataset():
+    # Arrange
+    dataset = DataSet()
+    
+    # Act
+    summary = dataset.describe()
+    
+    # Assert
+    assert summary.count == 0
+    assert summary.sum == summary.mean == summary.stddev == summary.median == 0
+    assert summary.mode == []
+    assert summary.quantiles == {0.25: 0, 0.5: 0, 0.75: 0}
+
 # Tests for DataSet: Window function
 
+def test_window_compact_matches_scan():
+    # Arrange
+    pytest.importorskip("numpy")
+    values = [1, 5, 3, 10, 5, -2, 2.5, float('nan'), float('inf'), 2**53]
+    dataset = DataSet(compact=True)
+    dataset.include_many(values)
+    bounds = [(3, 5), (5, 2), (-2, 2.5), (0, float('inf')), (2**53, 2**53),
+              (2**53 + 1, 2**60), (float('nan'), 10), (-10**400, 10**400)]
+    
+    # Act
+    counts = [dataset.window(lower, upper) for lower, upper in bounds]
+    
+    # Assert
+    assert counts == [sum(1 for x in values if lower <= x <= upper) for lower, upper in bounds]
+    with pytest.raises(TypeError):
+        dataset.window("invalid", 5)
+
 def test_window_with_negative_bounds():
     # Arrange
     dataset = DataSet()
@@ -526,3 +1199,326 @@ def test_web_reader_no_numbers():
     with pytest.raises(ValueError) as exc_info:
         reader.parse("https://example.com")
     assert "No numeric values found" in str(exc_info.value)
+
+
+# Local HTTP server used by the batch web reader tests
+
+PAGES = {
+    "/scores": "<html><body><p>Alan</p><p>6</p><p>Dan</p><p>18</p></body></html>",
+    "/more": "<html><body><td>17</td><td>4.5</td></body></html>",
+    "/words": "<html><body><p>No numbers here</p></body></html>",
+}
+
+# Number of requests served per path by the web_server fixture
+SERVER_HITS = {}
+
+@pytest.fixture
+def web_server():
+    """Serve PAGES on localhost; /flaky fails with 503 before succeeding
+    and /etag answers conditional requests with 304"""
+    hits = SERVER_HITS
+    hits.clear()
+    hits.update({"/flaky": 0, "/etag": 0, "/etag 304": 0})
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/etag":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    hits["/etag 304"] += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                hits["/etag"] += 1
+                self.send_response(200)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                self.wfile.write(b"<p>1.5</p><p>x</p><p>-3</p>")
+                return
+            if self.path == "/flaky":
+                hits["/flaky"] += 1
+                if hits["/flaky"] < 3:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = "<p>42</p>"
+            elif self.path == "/large":
+                body = "<table>" + "".join(f"<td>{i}</td>" for i in range(5000)) + "</table>"
+            elif self.path in PAGES:
+                body = PAGES[self.path]
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(body.encode("utf-8"))
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+# Tests for DataSetReaderWeb: parse_many function
+
+def test_web_reader_parse_many_returns_dataset_per_url(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    urls = [web_server + "/scores", web_server + "/more"]
+    
+    # Act
+    datasets, failures = reader.parse_many(urls, concurrency=2)
+    
+    # Assert
+    assert failures == {}
+    assert [d._data for d in datasets] == [[6, 18], [17, 4.5]]
+
+def test_web_reader_parse_many_merges(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    urls = [web_server + "/scores", web_server + "/more"]
+    
+    # Act
+    dataset, failures = reader.parse_many(urls, merge=True)
+    
+    # Assert
+    assert dataset._data == [6, 18, 17, 4.5]
+    assert dataset.sum() == 45.5
+
+def test_web_reader_parse_many_reports_failures(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    urls = [web_server + "/missing", web_server + "/words", web_server + "/scores"]
+    
+    # Act
+    datasets, failures = reader.parse_many(urls, retries=0)
+    
+    # Assert
+    assert datasets[0] is None and datasets[1] is None
+    assert datasets[2]._data == [6, 18]
+    assert "Failed to fetch URL" in failures[urls[0]]
+    assert "No numeric values found" in failures[urls[1]]
+
+def test_web_reader_parse_many_retries_server_errors(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    
+    # Act
+    datasets, failures = reader.parse_many([web_server + "/flaky"], retries=3, backoff=0)
+    
+    # Assert
+    assert failures == {}
+    assert datasets[0]._data == [42]
+
+# Tests for DataSetReaderWeb: response cache
+
+def test_web_reader_cache_revalidates_with_etag(web_server, tmp_path):
+    # Arrange
+    reader = DataSetReaderWeb(cache=WebCache(str(tmp_path)))
+    url = web_server + "/etag"
+    
+    # Act
+    first = reader.parse(url)
+    second = reader.parse(url)
+    
+    # Assert
+    assert first._data == second._data == [1.5, -3]
+    assert SERVER_HITS["/etag"] == 1
+    assert SERVER_HITS["/etag 304"] == 1
+
+def test_web_reader_cache_used_by_parse_many(web_server, tmp_path):
+    # Arrange
+    reader = DataSetReaderWeb(cache=WebCache(str(tmp_path)))
+    url = web_server + "/etag"
+    reader.parse(url)
+    
+    # Act
+    datasets, failures = reader.parse_many([url])
+    
+    # Assert
+    assert datasets[0]._data == [1.5, -3]
+    assert SERVER_HITS["/etag 304"] == 1
+
+def test_web_cache_evicts_least_recently_used(tmp_path):
+    # Arrange
+    cache = WebCache(str(tmp_path), max_bytes=700)
+    cache.put("http://a", '"a"', None, [1.0] * 40)
+    os.utime(cache._path("http://a"), (1, 1))
+    cache.put("http://b", '"b"', None, [2.0] * 40)
+    
+    # Act
+    cache.put("http://c", '"c"', None, [3.0] * 40)
+    
+    # Assert
+    assert cache.get("http://a") is None
+    assert list(cache.get("http://c").values) == [3.0] * 40
+
+def test_web_cache_put_failure_leaves_no_files(tmp_path):
+    # Arrange
+    cache = WebCache(str(tmp_path))
+    
+    # Act
+    with pytest.raises(TypeError):
+        cache.put("http://a", '"a"', None, [1.0, "x"])
+    
+    # Assert
+    assert os.listdir(tmp_path) == []
+    assert cache.get("http://a") is None
+
+# Tests for DataSetReaderWeb: stream extraction engine
+
+@pytest.mark.parametrize("html", [
+    "<html><body><p>Alan</p><p>6</p><p>Dan</p><p> 18 </p></body></html>",
+    "<title>7</title><style>8</style><script>9</script><p>1<b>2</b> 3 &amp; 4&#53;</p>",
+    "<!DOCTYPE html><!-- 10 --><template><p>11</p></template><![CDATA[12]]><?pi 14?>",
+    "<p>1<rt>2</rt><rp>3</rp><br>4<br/>5<img src=6>7e1</p><p>nan</p>",
+    "<div><rt>1<p>2</div>3</rt>4",
+])
+def test_stream_engine_matches_soup_engine(html):
+    # Arrange
+    soup_reader = DataSetReaderWeb()
+    stream_reader = DataSetReaderWeb(engine="stream")
+    
+    # Act
+    soup_values = soup_reader._extract_values(html)
+    stream_values = stream_reader._extract_values(html)
+    
+    # Assert
+    assert str(stream_values) == str(soup_values)
+
+def test_html_number_parser_accepts_chunks():
+    # Arrange
+    parser = HtmlNumberParser()
+    html = "<p>12</p><p>3.5</p><script>4</script><p>-6</p>"
+    
+    # Act
+    for i in range(0, len(html), 3):
+        parser.feed(html[i:i + 3])
+    parser.close()
+    
+    # Assert
+    assert parser.values == [12, 3.5, -6]
+
+def test_web_reader_stream_engine(web_server):
+    # Arrange
+    reader = DataSetReaderWeb(engine="stream")
+    
+    # Act
+    dataset = reader.parse(web_server + "/scores")
+    
+    # Assert
+    assert dataset._data == [6, 18]
+
+def test_web_reader_unknown_engine():
+    # Act & Assert
+    with pytest.raises(ValueError):
+        DataSetReaderWeb(engine="regex")
+
+# Tests for DataSetReaderWeb: parse_stream function
+
+def test_web_reader_parse_stream(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    
+    # Act
+    dataset = reader.parse_stream(web_server + "/large", chunk_size=100)
+    
+    # Assert
+    assert dataset._data == list(range(5000))
+
+def test_web_reader_parse_stream_into_existing_dataset(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    dataset = DataSet()
+    dataset.include(1)
+    
+    # Act
+    result = reader.parse_stream(web_server + "/scores", dataset=dataset)
+    
+    # Assert
+    assert result is dataset
+    assert dataset._data == [1, 6, 18]
+
+def test_web_reader_parse_stream_max_bytes(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        reader.parse_stream(web_server + "/large", max_bytes=1000, chunk_size=100)
+    assert "larger than 1000 bytes" in str(exc_info.value)
+
+def test_web_reader_parse_stream_no_numbers(web_server):
+    # Arrange
+    reader = DataSetReaderWeb()
+    
+    # Act & Assert
+    with pytest.raises(ValueError) as exc_info:
+        reader.parse_stream(web_server + "/words")
+    assert "No numeric values found" in str(exc_info.value)
+
+# Tests for DataSet: Batch window and histogram functions
+
+def test_window_many_matches_window():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([5, 1, 3, 3, 9, -2, 7])
+    bounds = [(0, 5), (3, 3), (5, 2), (-10, -2), (10, 20), (1.5, 8.5)]
+    
+    # Act
+    result = dataset.window_many(bounds)
+    
+    # Assert
+    assert result == [dataset.window(lower, upper) for lower, upper in bounds]
+    assert result == [4, 2, 0, 1, 0, 4]
+
+def test_window_many_empty():
+    # Arrange
+    dataset = DataSet()
+    
+    # Act & Assert
+    assert dataset.window_many([(0, 1), (2, 3)]) == [0, 0]
+    assert dataset.window_many([]) == []
+
+def test_histogram_numpy_bin_convention():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([0, 1, 1, 2, 2.5, 3, 4, -1])
+    
+    # Act
+    result = dataset.histogram([0, 1, 2, 3])
+    
+    # Assert
+    # [0, 1) [1, 2) [2, 3] - the last bin keeps its upper edge, -1 and 4 fall outside
+    assert result == [1, 2, 3]
+
+def test_histogram_after_insert():
+    # Arrange
+    dataset = DataSet()
+    dataset.include_many([1, 2])
+    dataset.histogram([0, 5])
+    
+    # Act
+    dataset.include(5)
+    dataset.include(6)
+    
+    # Assert
+    assert dataset.histogram([0, 5, 10]) == [2, 2]
+    assert dataset.histogram([0, 2.5, 5]) == [2, 1]
+
+def test_histogram_invalid_edges():
+    # Arrange
+    dataset = DataSet()
+    dataset.include(1)
+    
+    # Act & Assert
+    with pytest.raises(ValueError):
+        dataset.histogram([1])
+    with pytest.raises(ValueError):
+        dataset.histogram([3, 2, 1])
+    assert DataSet().histogram([0, 1, 2]) == [0, 0]
@@ -0,0 +1,365 @@
+"""
+DataSet statistics computed in parallel across worker processes
+
+Usage:
+    from partitioned import PartitionedDataSet
+
+    with PartitionedDataSet(partitions=8) as dataset:
+        dataset.include_many(values)
+        print(dataset.sum(), dataset.median(), dataset.mode())
+
+Values live in a multiprocessing.shared_memory block of float64s, so
+workers read their partition in place instead of receiving a pickled
+copy. The first statistic asked for after new values arrive runs one
+reduction: every partition (a contiguous slice of the values) is folded
+by a worker into
+    - a RunningStats (count, min, max, mean, variance),
+    - an exact representation of its sum as a few non-overlapping floats,
+    - a frequency table in first-seen order,
+    - a sorted run, written back into a second shared block.
+The parent merges the partial aggregates, and the median and quantiles
+are found by k-th selection across the sorted runs, O(p log^2 n) for p
+partitions. sum, mean, mode, median, range and window return the same
+answers as a DataSet holding the same values (sum is correctly rounded,
+as DataSet.include_many gives for one batch); variance agrees to within
+rounding. Only the frequency tables and a few numbers per partition
+travel back through pickling.
+"""
+
+import math
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from dataset import DataSetSummary, RunningStats
+
+# Values the shared buffer is sized for at first; it doubles when full
+INITIAL_CAPACITY = 1 << 16
+
+# Each pass of _exact_sum adds at least 53 more bits of the exact sum
+MAX_SUM_PASSES = 64
+
+def _attach(name):
+    """Attach to an existing shared memory block without taking ownership.
+
+    Before Python 3.13 attaching also registers the block with the
+    resource tracker; workers share the parent's tracker, so that only
+    repeats the parent's own registration and the parent still unlinks."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _exact_sum(values):
+    """Returns non-overlapping floats whose exact sum is the exact sum of values.
+
+    Each pass takes the correctly rounded sum of what is left over, so a
+    math.fsum of the partials of every partition is the correctly rounded
+    sum of all the values. Two passes are almost always enough. fsum
+    cannot add inf to -inf or go beyond the float range; then the values
+    are summed in order as a single partial, as DataSet.sum() does."""
+    partials = []
+    try:
+        for _ in range(MAX_SUM_PASSES):
+            partial = math.fsum(chain(values, (-p for p in partials)))
+            if partial == 0:
+                break
+            partials.append(partial)
+            if not math.isfinite(partial):
+                break
+    except (OverflowError, ValueError):
+        return [sum(values)]
+    return partials
+
+def _sum_partials(partials):
+    """Returns the correctly rounded sum of the partials of every partition."""
+    try:
+        return math.fsum(partials)
+    except (OverflowError, ValueError):
+        # inf and -inf from different partitions
+        return sum(partials)
+
+def _reduce_partition(data_name, runs_name, start, end):
+    """Worker: fold values[start:end] into partial aggregates and write
+    the sorted run to the same slice of the runs block."""
+    data = _attach(data_name)
+    runs = _attach(runs_name)
+    values = data.buf.cast('d')
+    run = runs.buf.cast('d')
+    try:
+        # Released on the way out even if something below raises, so the
+        # cleanup in finally does not fail on an exported buffer
+        with values[start:end] as partition:
+            stats = RunningStats()
+            stats.add_many(partition)
+            partials = _exact_sum(partition)
+            # Counter keeps the order values were first seen in
+            counts = list(Counter(partition).items())
+            run[start:end] = array('d', sorted(partition))
+        return stats, partials, counts
+    finally:
+        values.release()
+        run.release()
+        data.close()
+        runs.close()
+
+def _select(runs, k):
+    """Returns the k-th smallest value (from 0) across sorted runs."""
+    lows = [0] * len(runs)
+    highs = [len(run) for run in runs]
+    while True:
+        # Pivot on the middle of the widest remaining range, which at
+        # least halves that range every round
+        widest = max(range(len(runs)), key=lambda i: highs[i] - lows[i])
+        pivot = runs[widest][(lows[widest] + highs[widest]) // 2]
+        below = [bisect_left(run, pivot, low, high) for run, low, high in zip(runs, lows, highs)]
+        through = [bisect_right(run, pivot, low, high) for run, low, high in zip(runs, lows, highs)]
+        smaller = sum(b - low for b, low in zip(below, lows))
+        equal = sum(t - b for t, b in zip(through, below))
+        if k < smaller:
+            highs = below
+        elif k < smaller + equal:
+            return pivot
+        else:
+            k -= smaller + equal
+            lows = through
+
+class PartitionedDataSet:
+    """DataSet variant whose statistics are reduced by a process pool.
+
+    Offers the DataSet methods (include, include_many, join, sum, mean,
+    median, mode, min, max, range, window, quantile, percentile, variance,
+    stddev, describe). Values are stored as float64 in shared memory; call
+    close() (or use it as a context manager) to free the shared blocks
+    and the worker pool.
+    """
+
+    def __init__(self, partitions=None, workers=None):
+        self.partitions = partitions or os.cpu_count() or 1
+        self.workers = workers or self.partitions
+        self._count = 0
+        self._data = shared_memory.SharedMemory(create=True, size=INITIAL_CAPACITY * 8)
+        self._runs = None
+        self._pool = None
+        self._reduced = None  # (stats, sum, frequency, runs, runs view) of the last reduction
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Shut the worker pool down and unlink the shared memory blocks."""
+        self._release_runs()
+        if getattr(self, '_pool', None) is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for block in (getattr(self, '_data', None), getattr(self, '_runs', None)):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self._data = self._runs = None
+
+    def include(self, data_point):
+        if not isinstance(data_point, (int, float)):
+            raise TypeError("Data point must be a number")
+        self.include_many([data_point])
+
+    def include_many(self, data_points):
+        """Add a batch of values; the whole batch is validated first."""
+        values = data_points if isinstance(data_points, array) else list(data_points)
+        if not isinstance(values, array) and not all(isinstance(value, (int, float)) for value in values):
+            raise TypeError("Data point must be a number")
+        batch = values if isinstance(values, array) and values.typecode == 'd' else array('d', values)
+        if len(batch) == 0:
+            return
+        self._reserve(self._count + len(batch))
+        self._release_runs()
+        target = self._data.buf.cast('d')
+        target[self._count:self._count + len(batch)] = batch
+        target.release()
+        self._count += len(batch)
+
+    def join(self, other_set):
+        """Add the values of a DataSet (or any variant with _values()) or
+        an iterable of numbers."""
+        values = other_set._values() if hasattr(other_set, '_values') else other_set
+        self.include_many(values)
+
+    def _values(self):
+        values = self._data.buf.cast('d')
+        try:
+            return array('d', values[:self._count])
+        finally:
+            values.release()
+
+    def _reserve(self, count):
+        # Grow the shared buffer by doubling, copying the values across
+        capacity = self._data.size // 8
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        grown = shared_memory.SharedMemory(create=True, size=capacity * 8)
+        grown.buf[:self._count * 8] = self._data.buf[:self._count * 8]
+        self._data.close()
+        self._data.unlink()
+        self._data = grown
+
+    def _release_runs(self):
+        # New values make the last reduction stale
+        if getattr(self, '_reduced', None) is not None:
+            for view in self._reduced[3]:
+                view.release()
+            self._reduced[4].release()
+        self._reduced = None
+
+    def _reduce(self):
+        if self._reduced is not None:
+            return self._reduced
+        if self._runs is None or self._runs.size < self._data.size:
+            if self._runs is not None:
+                self._runs.close()
+                self._runs.unlink()
+            self._runs = shared_memory.SharedMemory(create=True, size=self._data.size)
+
+        bounds = [self._count * i // self.partitions for i in range(self.partitions + 1)]
+        ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        futures = [self._pool.submit(_reduce_partition, self._data.name, self._runs.name, start, end)
+                   for start, end in ranges]
+
+        stats = RunningStats()
+        partials = []
+        frequency = Counter()
+        # Merge in partition order so the frequency table keeps the
+        # order in which values were first seen across the whole set
+        for future in futures:
+            part_stats, part_partials, counts = future.result()
+            stats.merge(part_stats)
+            partials.extend(part_partials)
+            for value, count in counts:
+                frequency[value] += count
+
+        runs_view = self._runs.buf.cast('d')
+        runs = [runs_view[start:end] for start, end in ranges]
+        self._reduced = (stats, _sum_partials(partials), frequency, runs, runs_view)
+        return self._reduced
+
+    def sum(self):
+        """Returns the correctly rounded sum, or 0 if the dataset is empty."""
+        if self._count == 0:
+            return 0
+        return self._reduce()[1]
+
+    def mean(self):
+        """Returns the mean, or 0 if the dataset is empty."""
+        if self._count == 0:
+            return 0
+        return self.sum() / self._count
+
+    def variance(self):
+        """Returns the population variance, or 0 if the dataset is empty."""
+        if self._count == 0:
+            return 0
+        return self._reduce()[0].variance()
+
+    def stddev(self):
+        """Returns the population standard deviation, or 0 if the dataset is empty."""
+        return math.sqrt(self.variance())
+
+    def min(self):
+        """Returns the minimum value, or 0 if the dataset is empty."""
+        if self._count == 0:
+            return 0
+        return self._reduce()[0].min()
+
+    def max(self):
+        """Returns the maximum value, or 0 if the dataset is empty."""
+        if self._count == 0:
+            return 0
+        return self._reduce()[0].max()
+
+    def range(self):
+        """Returns (min, max), or (0, 0) if the dataset is empty."""
+        return (self.min(), self.max())
+
+    def mode(self):
+        """Returns the mode(s), following DataSet.mode(): [] if empty, the
+        smallest value if all are unique, a single value if there is one
+        mode and otherwise a list in order of first appearance."""
+        if self._count == 0:
+            return []
+        frequency = self._reduce()[2]
+        highest = max(frequency.values())
+        modes = [value for value, count in frequency.items() if count == highest]
+        if len(modes) == 1:
+            return modes[0]
+        if len(modes) == self._count:
+            return min(modes)
+        return modes
+
+    def quantile(self, q):
+        """Returns the q-th quantile, 0 <= q <= 1, interpolating linearly
+        between the two nearest values as DataSet.quantile() does, or 0
+        if the dataset is empty."""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if self._count == 0:
+            return 0
+        runs = self._reduce()[3]
+        position = q * (self._count - 1)
+        lower = int(position)
+        fraction = position - lower
+        lower_value = _select(runs, lower)
+        if fraction == 0:
+            return lower_value
+        return lower_value + (_select(runs, lower + 1) - lower_value) * fraction
+
+    def median(self):
+        """Returns the median, or 0 if the dataset is empty."""
+        if self._count == 0:
+            return 0
+        runs = self._reduce()[3]
+        mid = self._count // 2
+        if self._count % 2 == 0:
+            return (_select(runs, mid - 1) + _select(runs, mid)) / 2
+        return _select(runs, mid)
+
+    def percentile(self, p):
+        """Returns the p-th percentile, 0 <= p <= 100."""
+        if not 0 <= p <= 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        return self.quantile(p / 100)
+
+    def window(self, lower_bound, upper_bound):
+        """Returns the number of values within the bounds (inclusive), with
+        two binary searches per sorted run."""
+        if self._count == 0:
+            return 0
+        count = sum(bisect_right(run, upper_bound) - bisect_left(run, lower_bound)
+                    for run in self._reduce()[3])
+        return max(count, 0)
+
+    def describe(self, quantiles=(0.25, 0.5, 0.75)):
+        """Returns the DataSet.describe() summary from a single reduction."""
+        return DataSetSummary(
+            count=self._count,
+            sum=self.sum(),
+            mean=self.mean(),
+            variance=self.variance(),
+            stddev=self.stddev(),
+            min=self.min(),
+            max=self.max(),
+            median=self.median(),
+            mode=self.mode(),
+            quantiles={q: self.quantile(q) for q in quantiles})
@@ -0,0 +1,127 @@
+import pytest
+import random
+from multiprocessing import shared_memory
+from dataset import DataSet, RunningStats
+import partitioned
+from partitioned import PartitionedDataSet, _select
+
+@pytest.fixture
+def values():
+    """20,000 values mixing repeated integers, floats and large cancelling terms"""
+    rng = random.Random(11)
+    return [rng.choice([rng.randint(0, 40), rng.uniform(-1e6, 1e6), 1e16, -1e16, 0.1])
+            for _ in range(20000)]
+
+def exact(values):
+    """DataSet over the same values, for comparison"""
+    dataset = DataSet()
+    dataset.include_many(values)
+    return dataset
+
+@pytest.mark.parametrize("partitions", [1, 3, 8])
+def test_matches_dataset(values, partitions):
+    """Test the merged partial aggregates give DataSet's answers"""
+    expected = exact(values)
+    with PartitionedDataSet(partitions=partitions, workers=2) as dataset:
+        dataset.include_many(values)
+        assert dataset.sum() == expected.sum()
+        assert dataset.mean() == expected.mean()
+        assert dataset.mode() == expected.mode()
+        assert dataset.median() == expected.median()
+        assert dataset.range() == expected.range()
+        assert dataset.quantile(0.9) == expected.quantile(0.9)
+        assert dataset.window(-100, 100) == expected.window(-100, 100)
+        assert dataset.variance() == pytest.approx(expected.variance())
+
+def test_new_values_trigger_new_reduction(values):
+    """Test values added after a query are included in the next one"""
+    with PartitionedDataSet(partitions=4, workers=2) as dataset:
+        dataset.include_many(values[:101])
+        assert dataset.median() == exact(values[:101]).median()
+        for value in values[101:200]:
+            dataset.include(value)
+        dataset.join(exact(values[200:]))
+        assert dataset.median() == exact(values).median()
+        assert dataset.sum() == exact(values).sum()
+
+def test_buffer_grows(monkeypatch):
+    """Test the shared buffer is reallocated when it fills up"""
+    monkeypatch.setattr(partitioned, 'INITIAL_CAPACITY', 4)
+    with PartitionedDataSet(partitions=2, workers=1) as dataset:
+        dataset.include_many([5, 1, 4])
+        dataset.include_many(range(10, 20))
+        assert dataset._values().tolist() == [5, 1, 4] + list(range(10, 20))
+        assert dataset.median() == 13
+
+def test_mode_ties_in_order_of_first_appearance():
+    """Test tied modes are listed as DataSet lists them, across partitions"""
+    values = [3, 1, 2, 1, 3, 5, 4, 4, 2]
+    with PartitionedDataSet(partitions=3, workers=2) as dataset:
+        dataset.include_many(values)
+        assert dataset.mode() == exact(values).mode() == [3, 1, 2, 4]
+    with PartitionedDataSet(partitions=3, workers=2) as dataset:
+        dataset.include_many([9, 7, 8])
+        assert dataset.mode() == 7
+
+@pytest.mark.parametrize("values", [[1, float('inf'), float('-inf'), 2],
+                                    [float('inf'), 1, float('-inf'), 2],
+                                    [1e308, 1e308, 5, 6]])
+def test_non_finite_sums(values):
+    """Test inf and -inf together, or sums beyond the float range, as DataSet gives them"""
+    expected = exact(values)
+    with PartitionedDataSet(partitions=2, workers=1) as dataset:
+        dataset.include_many(values)
+        assert repr(dataset.sum()) == repr(expected.sum())
+        assert dataset.range() == expected.range()
+
+def test_worker_error_is_not_hidden(monkeypatch):
+    """Test an error while reducing a partition is raised as itself"""
+    class FailingStats(RunningStats):
+        def add_many(self, values):
+            raise RuntimeError("reduction failed")
+    monkeypatch.setattr(partitioned, 'RunningStats', FailingStats)
+    data = shared_memory.SharedMemory(create=True, size=3 * 8)
+    runs = shared_memory.SharedMemory(create=True, size=3 * 8)
+    try:
+        with pytest.raises(RuntimeError):
+            partitioned._reduce_partition(data.name, runs.name, 0, 3)
+    finally:
+        for block in (data, runs):
+            block.close()
+            block.unlink()
+
+def test_select_across_runs():
+    """Test k-th selection over sorted runs with duplicates and empty runs"""
+    runs = [[1, 4, 4, 9], [], [2, 4, 5], [0]]
+    merged = sorted(value for run in runs for value in run)
+    assert [_select(runs, k) for k in range(len(merged))] == merged
+
+def test_close_unlinks_shared_memory():
+    """Test close() frees the shared blocks"""
+    dataset = PartitionedDataSet(partitions=2, workers=1)
+    dataset.include_many([1, 2, 3])
+    dataset.median()
+    names = [dataset._data.name, dataset._runs.name]
+    dataset.close()
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+def test_empty_partitioned_dataset():
+    """Test empty results follow DataSet conventions"""
+    with PartitionedDataSet(partitions=2) as dataset:
+        assert dataset.sum() == 0
+        assert dataset.mean() == 0
+        assert dataset.median() == 0
+        assert dataset.mode() == []
+        assert dataset.range() == (0, 0)
+        assert dataset.window(0, 10) == 0
+
+def test_include_invalid_type():
+    """Test non-numbers are rejected and nothing is added"""
+    with PartitionedDataSet(partitions=2) as dataset:
+        with pytest.raises(TypeError):
+            dataset.include("not a number")
+        with pytest.raises(TypeError):
+            dataset.include_many([1, "not a number"])
+        assert dataset.sum() == 0
@@ -0,0 +1,151 @@
+"""
+Opt-in instrumentation for the DataSet readers and statistics
+
+When enabled, the readers record how long each stage of ingestion takes
+(reading the file or fetching the page, tokenizing, converting cells to
+floats, extracting text from HTML, adding values to the DataSet) along with
+how many items and bytes each stage handled. DataSet statistics record
+their call counts and times. Stage times are inclusive: describe() also
+shows up under the statistics it calls.
+
+Usage:
+    import profiling
+    from csv_reader import DataSetReaderCsv
+
+    profiling.enable()
+    DataSetReaderCsv().parse("csv1.csv")
+    print(profiling.format_report())   # Table for humans
+    profiling.report()                  # Dict of stage -> counters
+    print(profiling.prometheus())       # Prometheus text exposition format
+
+When disabled (the default) hot loops only test the module-level ENABLED
+flag, and stage() hands back a shared do-nothing timer.
+"""
+
+import threading
+import time
+from functools import wraps
+
+ENABLED = False
+
+# Stage name -> [calls, seconds, items, bytes]
+_stages = {}
+_lock = threading.Lock()
+
+def enable():
+    """Start recording stages."""
+    global ENABLED
+    ENABLED = True
+
+def disable():
+    """Stop recording stages; what was recorded is kept until reset()."""
+    global ENABLED
+    ENABLED = False
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _stages.clear()
+
+def record(name, seconds, items=0, nbytes=0):
+    """Add one call of a stage, whether or not profiling is enabled."""
+    with _lock:
+        counters = _stages.get(name)
+        if counters is None:
+            _stages[name] = [1, seconds, items, nbytes]
+        else:
+            counters[0] += 1
+            counters[1] += seconds
+            counters[2] += items
+            counters[3] += nbytes
+
+class _Timer:
+    """Times a with-block as one call of a stage. Set .items and .bytes
+    inside the block to record how much work it did."""
+    __slots__ = ('name', 'items', 'bytes', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start, self.items, self.bytes)
+
+class _NullTimer:
+    """Stand-in for _Timer while profiling is disabled."""
+    __slots__ = ('items', 'bytes')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+def stage(name):
+    """Returns a context manager timing one call of the named stage."""
+    return _Timer(name) if ENABLED else _NULL_TIMER
+
+def timed(name):
+    """Decorator recording every call of a function as the named stage."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def report():
+    """Returns the recorded stages as a dict of stage name -> dict with
+    calls, seconds, items, bytes, items_per_second and bytes_per_second."""
+    with _lock:
+        stages = {name: list(counters) for name, counters in sorted(_stages.items())}
+    result = {}
+    for name, (calls, seconds, items, nbytes) in stages.items():
+        result[name] = {
+            'calls': calls,
+            'seconds': seconds,
+            'items': items,
+            'bytes': nbytes,
+            'items_per_second': items / seconds if seconds > 0 else 0.0,
+            'bytes_per_second': nbytes / seconds if seconds > 0 else 0.0,
+        }
+    return result
+
+def format_report():
+    """Returns the recorded stages as a text table."""
+    lines = [f"{'stage':<28} {'calls':>8} {'seconds':>10} {'items':>12} {'bytes':>14} {'MB/s':>9}"]
+    for name, stats in report().items():
+        lines.append(f"{name:<28} {stats['calls']:>8} {stats['seconds']:>10.4f} {stats['items']:>12} "
+                     f"{stats['bytes']:>14} {stats['bytes_per_second'] / 1e6:>9.1f}")
+    return "\n".join(lines)
+
+def prometheus(prefix='dataset'):
+    """Returns the recorded stages in the Prometheus text exposition format."""
+    stages = report()
+    metrics = [
+        ('stage_calls_total', 'calls', 'Number of times each stage ran'),
+        ('stage_seconds_total', 'seconds', 'Time spent in each stage'),
+        ('stage_items_total', 'items', 'Items (rows, cells, values) handled by each stage'),
+        ('stage_bytes_total', 'bytes', 'Bytes handled by each stage'),
+    ]
+    lines = []
+    for metric, field, help_text in metrics:
+        lines.append(f"# HELP {prefix}_{metric} {help_text}")
+        lines.append(f"# TYPE {prefix}_{metric} counter")
+        for name, stats in stages.items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{prefix}_{metric}{{stage="{label}"}} {stats[field]}')
+    return "\n".join(lines) + "\n"
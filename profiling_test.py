@@ -0,0 +1,81 @@
+import pytest
+import os
+import profiling
+from csv_reader import DataSetReaderCsv
+from dataset import DataSet, DataSetReaderWeb
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'csv1.csv')
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    """Start every test with profiling disabled and nothing recorded"""
+    profiling.disable()
+    profiling.reset()
+    yield
+    profiling.disable()
+    profiling.reset()
+
+def test_disabled_records_nothing():
+    """Test nothing is recorded unless profiling is enabled"""
+    DataSetReaderCsv().parse(SAMPLE_CSV).median()
+    assert profiling.report() == {}
+
+def test_csv_parse_stages():
+    """Test reading, tokenizing, converting and including are reported separately"""
+    profiling.enable()
+    dataset = DataSetReaderCsv().parse(SAMPLE_CSV)
+    report = profiling.report()
+    assert report['csv.read']['bytes'] == os.path.getsize(SAMPLE_CSV)
+    assert report['csv.read']['items'] == 3
+    assert report['csv.tokenize']['items'] == 3
+    assert report['csv.convert']['items'] == 9
+    assert report['dataset.include_many']['items'] == 8
+    assert report['csv.parse']['calls'] == 1
+    assert report['csv.parse']['seconds'] >= report['csv.convert']['seconds']
+    profiling.disable()
+    assert dataset._data == DataSetReaderCsv().parse(SAMPLE_CSV)._data
+
+def test_profiled_parse_iter_keeps_chunks(tmp_path):
+    """Test the profiled loop yields the same chunks and skips the same cells"""
+    path = tmp_path / "values.csv"
+    path.write_text("1,2,x\n\n3, ,4\n5")
+    expected = [list(chunk) for chunk in DataSetReaderCsv().parse_iter(str(path), chunk_size=2)]
+    profiling.enable()
+    chunks = [list(chunk) for chunk in DataSetReaderCsv().parse_iter(str(path), chunk_size=2)]
+    assert chunks == expected == [[1, 2], [3, 4], [5]]
+    assert profiling.report()['csv.read']['items'] == 4
+
+def test_statistics_are_timed():
+    """Test statistics record a call each, including those made by describe()"""
+    dataset = DataSet()
+    dataset.include_many([3, 1, 2])
+    profiling.enable()
+    dataset.median()
+    dataset.describe()
+    report = profiling.report()
+    assert report['dataset.median']['calls'] == 2
+    assert report['dataset.describe']['calls'] == 1
+
+def test_web_extract_stage():
+    """Test the HTML extraction engine is reported with the values it found"""
+    profiling.enable()
+    DataSetReaderWeb(engine='stream')._extract_values("<p>1</p><p>x</p><p>2.5</p>")
+    assert profiling.report()['web.extract.stream']['items'] == 2
+
+def test_prometheus_format():
+    """Test the Prometheus exposition has HELP/TYPE lines and labelled samples"""
+    profiling.record('csv.read', 0.5, items=3, nbytes=27)
+    profiling.record('csv.read', 0.25, items=1, nbytes=10)
+    text = profiling.prometheus()
+    assert '# TYPE dataset_stage_seconds_total counter' in text
+    assert 'dataset_stage_seconds_total{stage="csv.read"} 0.75' in text
+    assert 'dataset_stage_bytes_total{stage="csv.read"} 37' in text
+    assert 'dataset_stage_calls_total{stage="csv.read"} 2' in text
+    assert text.endswith('\n')
+
+def test_format_report():
+    """Test the text report has a row per stage"""
+    profiling.record('web.fetch', 0.1, nbytes=1000000)
+    lines = profiling.format_report().splitlines()
+    assert len(lines) == 2
+    assert lines[1].split()[0] == 'web.fetch'
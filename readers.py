@@ -0,0 +1,236 @@
+"""
+Registry of DataSet readers and writers
+
+Every reader has a parse(source) method returning a DataSet, and every
+writer a write(dataset, path) method. Readers are looked up by format
+name, or picked from a source's URL scheme or file extension.
+
+Usage:
+    from readers import read, write
+
+    dataset = read("data/prices.parquet", column="amount")
+    write(dataset, "prices.arrow")
+
+    # Add a reader of your own
+    register_reader("tsv", MyTsvReader, extensions=(".tsv",))
+
+Arrow IPC and Parquet support needs pyarrow (pip install pyarrow). The
+column's float64 buffers are copied straight into compact DataSet storage,
+without converting the values one by one. Nulls are dropped and integer
+columns are cast to float64.
+"""
+
+import os
+from array import array
+from urllib.parse import urlsplit
+
+from csv_reader import DataSetReaderCsv
+from dataset import DataSet, DataSetReaderWeb
+
+# Format name -> factory, and the extensions/schemes that select it
+READERS = {}
+WRITERS = {}
+READER_EXTENSIONS = {}
+READER_SCHEMES = {}
+WRITER_EXTENSIONS = {}
+
+DEFAULT_COLUMN = 'value'
+
+def register_reader(name, factory, extensions=(), schemes=()):
+    """Register a reader factory under name.
+
+    Args:
+        name (str): Format name used by get_reader()
+        factory: Callable returning an object with a parse(source) method
+        extensions: File extensions (e.g. '.csv') read by this format
+        schemes: URL schemes (e.g. 'https') read by this format"""
+    READERS[name] = factory
+    for extension in extensions:
+        READER_EXTENSIONS[extension.lower()] = name
+    for scheme in schemes:
+        READER_SCHEMES[scheme.lower()] = name
+
+def register_writer(name, factory, extensions=()):
+    """Register a writer factory (with a write(dataset, path) method) under name."""
+    WRITERS[name] = factory
+    for extension in extensions:
+        WRITER_EXTENSIONS[extension.lower()] = name
+
+def get_reader(name, **options):
+    """Returns a new reader for the named format."""
+    if name not in READERS:
+        raise ValueError(f"No reader registered for format '{name}'")
+    return READERS[name](**options)
+
+def get_writer(name, **options):
+    """Returns a new writer for the named format."""
+    if name not in WRITERS:
+        raise ValueError(f"No writer registered for format '{name}'")
+    return WRITERS[name](**options)
+
+def reader_format(source):
+    """Returns the name of the format that reads source, chosen by URL
+    scheme first and file extension second."""
+    scheme = urlsplit(source).scheme.lower()
+    if scheme in READER_SCHEMES:
+        return READER_SCHEMES[scheme]
+    extension = os.path.splitext(source)[1].lower()
+    if extension in READER_EXTENSIONS:
+        return READER_EXTENSIONS[extension]
+    raise ValueError(f"No reader registered for {source}")
+
+def writer_format(path):
+    """Returns the name of the format that writes path, chosen by file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in WRITER_EXTENSIONS:
+        return WRITER_EXTENSIONS[extension]
+    raise ValueError(f"No writer registered for {path}")
+
+def reader_for(source, **options):
+    """Returns a new reader for source (see reader_format)."""
+    return get_reader(reader_format(source), **options)
+
+def writer_for(path, **options):
+    """Returns a new writer for path (see writer_format)."""
+    return get_writer(writer_format(path), **options)
+
+def read(source, **options):
+    """Returns the DataSet read from source by the reader chosen for it."""
+    return reader_for(source, **options).parse(source)
+
+def write(dataset, path, **options):
+    """Writes dataset to path with the writer chosen for it."""
+    writer_for(path, **options).write(dataset, path)
+
+def _require_pyarrow():
+    """Imports pyarrow, with an informative error if it is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Arrow and Parquet support requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def _column_buffers(pa, table, column):
+    """Returns float64 memoryviews over the non-null values of one column.
+
+    Args:
+        column: Column name, index, or None for the first numeric column"""
+    if column is None:
+        numeric = [index for index, field in enumerate(table.schema)
+                   if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
+        if not numeric:
+            raise ValueError("No numeric column found")
+        column = numeric[0]
+    try:
+        chunked = table.column(column)
+    except (KeyError, IndexError) as e:
+        raise ValueError(f"Column {column!r} not found") from e
+    if not (pa.types.is_integer(chunked.type) or pa.types.is_floating(chunked.type)):
+        raise ValueError(f"Column {column!r} is not numeric")
+
+    views = []
+    for chunk in chunked.chunks:
+        if chunk.type != pa.float64():
+            chunk = chunk.cast(pa.float64())
+        if chunk.null_count:
+            chunk = chunk.drop_null()
+        if len(chunk):
+            data = memoryview(chunk.buffers()[1]).cast('B').cast('d')
+            views.append(data[chunk.offset:chunk.offset + len(chunk)])
+    return views
+
+def _float64_table(pa, dataset, column):
+    """Returns a one-column pyarrow Table sharing the dataset's compact storage if it has any."""
+    values = dataset._values()
+    if not isinstance(values, (array, memoryview)):
+        values = array('d', values)
+    data = pa.Array.from_buffers(pa.float64(), len(values), [None, pa.py_buffer(values)])
+    return pa.table({column: data})
+
+class DataSetReaderArrow:
+    """Reads one numeric column of an Arrow IPC (Feather v2) file."""
+
+    def __init__(self, column=None):
+        self.column = column
+
+    def parse(self, filepath):
+        pa = _require_pyarrow()
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+        with pa.memory_map(filepath) as source:
+            try:
+                table = pa.ipc.open_file(source).read_all()
+            except pa.ArrowInvalid:
+                source.seek(0)
+                table = pa.ipc.open_stream(source).read_all()
+            return DataSet.concat(_column_buffers(pa, table, self.column))
+
+class DataSetReaderParquet:
+    """Reads one numeric column of a Parquet file."""
+
+    def __init__(self, column=None):
+        self.column = column
+
+    def parse(self, filepath):
+        pa = _require_pyarrow()
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+        columns = None
+        if isinstance(self.column, str):
+            # Read only the named column; the footer tells us if it exists
+            if self.column not in pa.parquet.read_schema(filepath, memory_map=True).names:
+                raise ValueError(f"Column {self.column!r} not found")
+            columns = [self.column]
+        table = pa.parquet.read_table(filepath, columns=columns, memory_map=True)
+        return DataSet.concat(_column_buffers(pa, table, self.column))
+
+class DataSetReaderBinary:
+    """Reads files written by DataSet.save()."""
+
+    def __init__(self, mmap=True):
+        self.mmap = mmap
+
+    def parse(self, filepath):
+        return DataSet.load(filepath, mmap=self.mmap)
+
+class DataSetWriterArrow:
+    """Writes a dataset as a single float64 column of an Arrow IPC file."""
+
+    def __init__(self, column=DEFAULT_COLUMN):
+        self.column = column
+
+    def write(self, dataset, path):
+        pa = _require_pyarrow()
+        table = _float64_table(pa, dataset, self.column)
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+class DataSetWriterParquet:
+    """Writes a dataset as a single float64 column of a Parquet file."""
+
+    def __init__(self, column=DEFAULT_COLUMN):
+        self.column = column
+
+    def write(self, dataset, path):
+        pa = _require_pyarrow()
+        pa.parquet.write_table(_float64_table(pa, dataset, self.column), path)
+
+class DataSetWriterBinary:
+    """Writes the DataSet.save() format, with the sorted index if index is True."""
+
+    def __init__(self, index=False):
+        self.index = index
+
+    def write(self, dataset, path):
+        dataset.save(path, index=self.index)
+
+register_reader('csv', DataSetReaderCsv, extensions=('.csv', '.txt'))
+register_reader('web', DataSetReaderWeb, schemes=('http', 'https'))
+register_reader('arrow', DataSetReaderArrow, extensions=('.arrow', '.feather', '.ipc'))
+register_reader('parquet', DataSetReaderParquet, extensions=('.parquet', '.pq'))
+register_reader('dataset', DataSetReaderBinary, extensions=('.dset',))
+register_writer('arrow', DataSetWriterArrow, extensions=('.arrow', '.feather', '.ipc'))
+register_writer('parquet', DataSetWriterParquet, extensions=('.parquet', '.pq'))
+register_writer('dataset', DataSetWriterBinary, extensions=('.dset',))
@@ -0,0 +1,117 @@
+import pytest
+import os
+from array import array
+from csv_reader import DataSetReaderCsv
+from dataset import DataSet, DataSetReaderWeb
+import readers
+from readers import (DataSetReaderArrow, DataSetReaderBinary, get_reader, read,
+                     reader_for, register_reader, write, writer_format)
+
+@pytest.fixture
+def dataset():
+    """Dataset with a few values, one repeated"""
+    dataset = DataSet()
+    dataset.include_many([3, 1.5, -2, 3, 10])
+    return dataset
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Registry tables that are restored after the test"""
+    for table in ('READERS', 'READER_EXTENSIONS', 'READER_SCHEMES'):
+        monkeypatch.setattr(readers, table, dict(getattr(readers, table)))
+
+def test_reader_chosen_by_extension_and_scheme():
+    """Test built-in formats are picked from the file extension or URL scheme"""
+    assert isinstance(reader_for("data/prices.CSV"), DataSetReaderCsv)
+    assert isinstance(reader_for("https://example.com/prices.csv"), DataSetReaderWeb)
+    assert isinstance(reader_for("prices.feather", column="amount"), DataSetReaderArrow)
+    assert isinstance(reader_for("prices.dset"), DataSetReaderBinary)
+    assert writer_format("prices.parquet") == "parquet"
+
+def test_unknown_format():
+    """Test unregistered formats raise ValueError"""
+    with pytest.raises(ValueError) as exc_info:
+        reader_for("prices.xlsx")
+    assert "No reader registered" in str(exc_info.value)
+    with pytest.raises(ValueError):
+        get_reader("xlsx")
+    with pytest.raises(ValueError):
+        write(DataSet(), "prices.xlsx")
+
+def test_register_reader(registry, tmp_path):
+    """Test a custom reader is used for its extension"""
+    class LineReader:
+        def parse(self, filepath):
+            with open(filepath) as file:
+                return DataSet.from_buffer(array('d', map(float, file)))
+    register_reader("lines", LineReader, extensions=(".lines",))
+    path = tmp_path / "values.lines"
+    path.write_text("1\n2\n4\n")
+    assert read(str(path)).sum() == 7
+
+def test_read_csv():
+    """Test the CSV reader is reached through the registry"""
+    path = os.path.join(os.path.dirname(__file__), "csv1.csv")
+    assert read(path).sum() == DataSetReaderCsv().parse(path).sum()
+
+def test_binary_round_trip(dataset, tmp_path):
+    """Test the DataSet.save() format through write() and read()"""
+    path = str(tmp_path / "values.dset")
+    write(dataset, path, index=True)
+    loaded = read(path)
+    assert list(loaded._values()) == [3, 1.5, -2, 3, 10]
+    assert loaded.median() == 3
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_columnar_round_trip(dataset, tmp_path, extension):
+    """Test Arrow and Parquet files written from a dataset read back the same values"""
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / ("values" + extension))
+    write(dataset, path)
+    loaded = read(path)
+    assert list(loaded._values()) == [3, 1.5, -2, 3, 10]
+    assert read(path, column="value").mode() == 3
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_columnar_column_selection(tmp_path, extension):
+    """Test named, indexed and default column selection, with nulls dropped"""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    table = pa.table({"name": ["a", "b", "c"], "qty": [1, 2, None], "amount": [1.5, None, 4.0]})
+    path = str(tmp_path / ("values" + extension))
+    if extension == ".arrow":
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pyarrow.parquet.write_table(table, path)
+    assert list(read(path)._values()) == [1, 2]
+    assert list(read(path, column="amount")._values()) == [1.5, 4.0]
+    assert list(read(path, column=2)._values()) == [1.5, 4.0]
+    with pytest.raises(ValueError) as exc_info:
+        read(path, column="name")
+    assert "Column 'name' is not numeric" in str(exc_info.value)
+    with pytest.raises(ValueError) as exc_info:
+        read(path, column="missing")
+    assert "Column 'missing' not found" in str(exc_info.value)
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_columnar_empty_round_trip(tmp_path, extension):
+    """Test an empty dataset written to Arrow or Parquet reads back empty"""
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / ("empty" + extension))
+    write(DataSet(), path)
+    loaded = read(path)
+    assert len(loaded._values()) == 0
+    assert loaded.sum() == 0
+
+def test_columnar_requires_pyarrow(dataset, tmp_path):
+    """Test a missing pyarrow gives an informative error"""
+    try:
+        import pyarrow  # noqa: F401
+        pytest.skip("pyarrow is installed")
+    except ImportError:
+        pass
+    path = str(tmp_path / "values.parquet")
+    with pytest.raises(ImportError) as exc_info:
+        write(dataset, path)
+    assert "pip install pyarrow" in str(exc_info.value)
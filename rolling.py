@@ -0,0 +1,351 @@
+"""
+Rolling statistics over the most recent values of a stream
+
+Usage:
+    from rolling import RollingDataSet
+
+    # Keeps only the last 1000 values; older ones drop out as new ones arrive
+    latency = RollingDataSet(1000)
+    for value in stream:
+        latency.include(value)
+        print(latency.mean(), latency.median(), latency.max())
+
+Cost per include(), for a window of n values:
+    sum/mean/variance: O(1). Running totals are updated on insert and
+        eviction, and recomputed exactly once every n evictions so
+        floating-point drift cannot build up.
+    min/max: O(1) amortised, with monotonic deques.
+    median: O(log n), with two heaps and lazy deletion of evicted values.
+    mode: O(1), with a count -> values table.
+Queries of those are O(1) (mode is O(#modes)). window, quantile and
+percentile look at every value in the window, O(n) or O(n log n).
+"""
+
+import math
+from collections import deque
+from heapq import heapify, heappop, heappush
+
+from dataset import DataSetSummary
+
+class RollingDataSet:
+    """DataSet variant holding only the most recent `size` values.
+
+    Offers the DataSet methods (include, include_many, join, sum, mean,
+    median, mode, min, max, range, window, quantile, percentile, variance,
+    stddev, describe), each computed over the values currently in the
+    window. Empty results follow the DataSet conventions.
+    """
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("Window size must be at least 1")
+        self.size = size
+        self._ring = [0.0] * size
+        self._next = 0       # Sequence number of the next value
+        self._count = 0      # Values currently in the window
+        self._evictions = 0  # Since the totals were last recomputed
+
+        # Sum (Neumaier-compensated) and Welford mean/M2 of the window
+        self._total = 0.0
+        self._compensation = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+        # (sequence, value) pairs; values increase along _min_queue
+        # and decrease along _max_queue
+        self._min_queue = deque()
+        self._max_queue = deque()
+
+        # Lower half as a max-heap of (-value, -sequence) and upper half as
+        # a min-heap of (value, sequence). Evicted entries stay in the heaps
+        # until they reach the top (or the heaps are rebuilt).
+        self._low = []
+        self._high = []
+        self._low_size = 0
+        self._high_size = 0
+        self._evicted = set()
+
+        # value -> sequences of its copies in the window, oldest first,
+        # and count -> values seen that many times
+        self._occurrences = {}
+        self._by_count = {}
+        self._max_count = 0
+
+    def include(self, data_point):
+        if not isinstance(data_point, (int, float)):
+            raise TypeError("Data point must be a number")
+        self._add(data_point)
+
+    def include_many(self, data_points):
+        """Add a batch of values; the whole batch is validated first."""
+        values = list(data_points)
+        if not all(isinstance(value, (int, float)) for value in values):
+            raise TypeError("Data point must be a number")
+        for value in values:
+            self._add(value)
+
+    def join(self, other_set):
+        """Add the values of another DataSet, RollingDataSet or iterable of
+        numbers in order, as if each had been included."""
+        values = other_set._values() if hasattr(other_set, '_values') else other_set
+        self.include_many(values)
+
+    def _values(self):
+        # Values in the window, oldest first
+        start = (self._next - self._count) % self.size
+        if start + self._count <= self.size:
+            return self._ring[start:start + self._count]
+        return self._ring[start:] + self._ring[:(start + self._count) % self.size]
+
+    def _add(self, value):
+        sequence = self._next
+        if self._count == self.size:
+            self._evict(sequence - self.size)
+        self._ring[sequence % self.size] = value
+        self._next += 1
+        self._count += 1
+        self._add_totals(value)
+
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((sequence, value))
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((sequence, value))
+
+        if self._low_size and (value, sequence) <= self._low_top():
+            heappush(self._low, (-value, -sequence))
+            self._low_size += 1
+        else:
+            heappush(self._high, (value, sequence))
+            self._high_size += 1
+        self._rebalance()
+
+        occurrences = self._occurrences.setdefault(value, deque())
+        occurrences.append(sequence)
+        self._move_count(value, len(occurrences) - 1, len(occurrences))
+
+    def _evict(self, sequence):
+        value = self._ring[sequence % self.size]
+        self._count -= 1
+        self._remove_totals(value)
+
+        if self._min_queue[0][0] == sequence:
+            self._min_queue.popleft()
+        if self._max_queue[0][0] == sequence:
+            self._max_queue.popleft()
+
+        # Find its half before marking it, while it can still be the top
+        if (value, sequence) <= self._low_top():
+            self._low_size -= 1
+        else:
+            self._high_size -= 1
+        self._evicted.add(sequence)
+        self._rebalance()
+        if len(self._low) + len(self._high) > 2 * self.size:
+            self._rebuild_heaps()
+
+        occurrences = self._occurrences[value]
+        occurrences.popleft()
+        self._move_count(value, len(occurrences) + 1, len(occurrences))
+        if not occurrences:
+            del self._occurrences[value]
+
+    def _add_totals(self, value):
+        total = self._total + value
+        if abs(self._total) >= abs(value):
+            self._compensation += (self._total - total) + value
+        else:
+            self._compensation += (value - total) + self._total
+        self._total = total
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+    def _remove_totals(self, value):
+        self._evictions += 1
+        if self._evictions >= self.size:
+            # Recompute exactly once per window's worth of evictions, which
+            # keeps the cost O(1) amortised and bounds the rounding drift
+            self._recompute_totals()
+            return
+        if self._count == 0:
+            self._total = self._compensation = self._mean = self._m2 = 0.0
+            return
+        self._subtract_totals(value)
+
+    def _subtract_totals(self, value):
+        # Inverse of _add_totals, with _count already decremented
+        total = self._total - value
+        if abs(self._total) >= abs(value):
+            self._compensation += (self._total - total) - value
+        else:
+            self._compensation += (-value - total) + self._total
+        self._total = total
+        delta = value - self._mean
+        self._mean -= delta / self._count
+        self._m2 = max(self._m2 - delta * (value - self._mean), 0.0)
+
+    def _recompute_totals(self):
+        self._evictions = 0
+        values = self._values()
+        try:
+            self._total = math.fsum(values)
+        except (OverflowError, ValueError):
+            # fsum cannot add inf to -inf or go beyond the float range
+            self._total = sum(values)
+        self._compensation = 0.0
+        self._mean = self._total / len(values) if values else 0.0
+        try:
+            self._m2 = math.fsum((value - self._mean) * (value - self._mean) for value in values)
+        except OverflowError:
+            self._m2 = math.inf
+
+    def _low_top(self):
+        # Largest (value, sequence) in the lower half, after dropping evicted entries
+        while self._low and -self._low[0][1] in self._evicted:
+            self._evicted.discard(-heappop(self._low)[1])
+        if not self._low:
+            return None
+        value, sequence = self._low[0]
+        return (-value, -sequence)
+
+    def _high_top(self):
+        while self._high and self._high[0][1] in self._evicted:
+            self._evicted.discard(heappop(self._high)[1])
+        return self._high[0] if self._high else None
+
+    def _rebalance(self):
+        # Keep the lower half equal in size to the upper half, or one larger
+        while self._low_size > self._high_size + 1:
+            value, sequence = self._low_top()
+            heappop(self._low)
+            heappush(self._high, (value, sequence))
+            self._low_size -= 1
+            self._high_size += 1
+        while self._high_size > self._low_size:
+            value, sequence = self._high_top()
+            heappop(self._high)
+            heappush(self._low, (-value, -sequence))
+            self._high_size -= 1
+            self._low_size += 1
+        self._low_top()
+        self._high_top()
+
+    def _rebuild_heaps(self):
+        # Drop evicted entries buried below the heap tops
+        self._low = [entry for entry in self._low if -entry[1] not in self._evicted]
+        self._high = [entry for entry in self._high if entry[1] not in self._evicted]
+        heapify(self._low)
+        heapify(self._high)
+        self._evicted.clear()
+
+    def _move_count(self, value, old, new):
+        if old:
+            values = self._by_count[old]
+            values.discard(value)
+            if not values:
+                del self._by_count[old]
+                if old == self._max_count and new < old:
+                    self._max_count = new
+        if new:
+            self._by_count.setdefault(new, set()).add(value)
+            self._max_count = max(self._max_count, new)
+
+    def sum(self):
+        """Returns the sum of the values in the window, or 0 if it is empty."""
+        return self._total + self._compensation if self._count else 0
+
+    def mean(self):
+        """Returns the mean of the values in the window, or 0 if it is empty."""
+        return self._mean if self._count else 0
+
+    def variance(self):
+        """Returns the population variance of the window, or 0 if it is empty."""
+        return self._m2 / self._count if self._count else 0
+
+    def stddev(self):
+        """Returns the population standard deviation of the window, or 0 if it is empty."""
+        return math.sqrt(self.variance())
+
+    def min(self):
+        """Returns the smallest value in the window, or 0 if it is empty."""
+        return self._min_queue[0][1] if self._count else 0
+
+    def max(self):
+        """Returns the largest value in the window, or 0 if it is empty."""
+        return self._max_queue[0][1] if self._count else 0
+
+    def range(self):
+        """Returns (min, max) of the window, or (0, 0) if it is empty."""
+        return (self.min(), self.max())
+
+    def median(self):
+        """Returns the median of the window, or 0 if it is empty."""
+        if self._count == 0:
+            return 0
+        low = self._low_top()[0]
+        if self._count % 2:
+            return low
+        return (low + self._high_top()[0]) / 2
+
+    def mode(self):
+        """Returns the mode(s) of the window, following DataSet.mode():
+        [] if empty, the smallest value if all are unique, a single value
+        if there is one mode and otherwise a list in order of first
+        appearance within the window."""
+        if self._count == 0:
+            return []
+        modes = self._by_count[self._max_count]
+        if len(modes) == 1:
+            return next(iter(modes))
+        if len(modes) == self._count:
+            return min(modes)
+        return sorted(modes, key=lambda value: self._occurrences[value][0])
+
+    def quantile(self, q):
+        """Returns the q-th quantile of the window, 0 <= q <= 1, with linear
+        interpolation, or 0 if it is empty. Sorts the window: O(n log n)."""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if self._count == 0:
+            return 0
+        return self._quantile(sorted(self._values()), q)
+
+    @staticmethod
+    def _quantile(sorted_data, q):
+        position = q * (len(sorted_data) - 1)
+        lower = int(position)
+        fraction = position - lower
+        if fraction == 0:
+            return sorted_data[lower]
+        return sorted_data[lower] + (sorted_data[lower+1] - sorted_data[lower]) * fraction
+
+    def percentile(self, p):
+        """Returns the p-th percentile of the window, 0 <= p <= 100."""
+        if not 0 <= p <= 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        return self.quantile(p / 100)
+
+    def window(self, lower_bound, upper_bound):
+        """Returns the number of values in the window within the bounds (inclusive)."""
+        return sum(1 for value in self._values() if lower_bound <= value <= upper_bound)
+
+    def describe(self, quantiles=(0.25, 0.5, 0.75)):
+        """Returns the DataSet.describe() summary of the window; the
+        quantiles share one sort."""
+        for q in quantiles:
+            if not 0 <= q <= 1:
+                raise ValueError("Quantile must be between 0 and 1")
+        sorted_data = sorted(self._values())
+        return DataSetSummary(
+            count=self._count,
+            sum=self.sum(),
+            mean=self.mean(),
+            variance=self.variance(),
+            stddev=self.stddev(),
+            min=self.min(),
+            max=self.max(),
+            median=self.median(),
+            mode=self.mode(),
+            quantiles={q: self._quantile(sorted_data, q) if sorted_data else 0 for q in quantiles})
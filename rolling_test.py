@@ -0,0 +1,125 @@
+import pytest
+import math
+import random
+from dataset import DataSet
+from rolling import RollingDataSet
+
+def exact(values):
+    """DataSet over the same values, for comparison"""
+    dataset = DataSet()
+    dataset.include_many(values)
+    return dataset
+
+def test_keeps_last_values():
+    """Test only the most recent `size` values are kept, oldest first"""
+    dataset = RollingDataSet(3)
+    dataset.include_many([1, 2, 3, 4, 5])
+    assert dataset._values() == [3, 4, 5]
+    assert dataset.sum() == 12
+    assert dataset.mean() == 4
+    assert dataset.median() == 4
+    assert dataset.range() == (3, 5)
+
+def test_matches_dataset_on_every_step():
+    """Test every statistic against a DataSet of the current window"""
+    rng = random.Random(5)
+    dataset = RollingDataSet(7)
+    history = []
+    for _ in range(500):
+        value = rng.choice([rng.randint(0, 4), rng.uniform(-5, 5)])
+        dataset.include(value)
+        history.append(value)
+        expected = exact(history[-7:])
+        assert dataset.sum() == pytest.approx(expected.sum())
+        assert dataset.variance() == pytest.approx(expected.variance(), abs=1e-9)
+        assert dataset.median() == expected.median()
+        assert dataset.mode() == expected.mode()
+        assert dataset.range() == expected.range()
+        assert dataset.quantile(0.9) == expected.quantile(0.9)
+        assert dataset.window(-1, 2) == expected.window(-1, 2)
+
+def test_min_max_after_extremes_expire():
+    """Test the monotonic deques drop extremes once they leave the window"""
+    dataset = RollingDataSet(3)
+    dataset.include_many([100, 1, 2, 3])
+    assert dataset.max() == 3
+    dataset.include_many([-50, 4, 5, 6])
+    assert dataset.min() == 4
+
+def test_mode_follows_window():
+    """Test mode changes as repeated values leave the window"""
+    dataset = RollingDataSet(4)
+    dataset.include_many([7, 7, 7, 1])
+    assert dataset.mode() == 7
+    dataset.include_many([1, 2, 2])
+    assert dataset.mode() == [1, 2]
+    dataset.include(3)
+    assert dataset.mode() == 2
+
+def test_totals_do_not_drift():
+    """Test large values passing through the window leave no rounding error"""
+    dataset = RollingDataSet(10)
+    dataset.include_many([1e16, 1, -1e16] * 100)
+    dataset.include_many([0.1] * 10)
+    assert dataset.sum() == pytest.approx(1.0)
+    assert dataset.variance() == pytest.approx(0, abs=1e-12)
+
+def test_infinities_pass_through_recompute():
+    """Test inf and -inf in the window when the totals are recomputed"""
+    inf = float('inf')
+    dataset = RollingDataSet(3)
+    dataset.include_many([1, 2, 3, inf, -inf, 5])
+    assert dataset._values() == [inf, -inf, 5]
+    assert math.isnan(dataset.sum())
+    assert dataset.range() == (-inf, inf)
+    dataset.include_many([6, 7, 8])
+    assert dataset._values() == [6, 7, 8]
+    assert dataset.sum() == 21
+    assert dataset.variance() == pytest.approx(2 / 3)
+
+def test_heaps_stay_bounded():
+    """Test lazily deleted median entries do not pile up"""
+    dataset = RollingDataSet(100)
+    dataset.include_many(range(10000))
+    assert len(dataset._low) + len(dataset._high) <= 2 * 100 + 1
+    assert dataset.median() == 9949.5
+
+def test_join_adds_values_in_order():
+    """Test join() includes another set's values as a stream"""
+    dataset = RollingDataSet(3)
+    dataset.include(10)
+    dataset.join(exact([1, 2]))
+    assert dataset._values() == [10, 1, 2]
+    dataset.join(RollingDataSet(2))
+    assert dataset._values() == [10, 1, 2]
+
+def test_describe():
+    """Test describe() summarises the window"""
+    dataset = RollingDataSet(4)
+    dataset.include_many([9, 1, 2, 3, 4])
+    summary = dataset.describe()
+    assert summary.count == 4
+    assert summary.median == 2.5
+    assert summary.quantiles == exact([1, 2, 3, 4]).describe().quantiles
+
+def test_empty_rolling_dataset():
+    """Test empty results follow DataSet conventions"""
+    dataset = RollingDataSet(5)
+    assert dataset.sum() == 0
+    assert dataset.mean() == 0
+    assert dataset.median() == 0
+    assert dataset.mode() == []
+    assert dataset.range() == (0, 0)
+    assert dataset.window(0, 10) == 0
+    assert dataset.describe().count == 0
+
+def test_invalid_input():
+    """Test bad sizes and non-numbers are rejected"""
+    with pytest.raises(ValueError):
+        RollingDataSet(0)
+    dataset = RollingDataSet(2)
+    with pytest.raises(TypeError):
+        dataset.include("not a number")
+    with pytest.raises(TypeError):
+        dataset.include_many([1, "not a number"])
+    assert dataset.sum() == 0
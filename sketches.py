@@ -0,0 +1,377 @@
+"""
+Approximate, mergeable summaries for datasets too large to store
+
+Usage:
+    from sketches import SketchDataSet
+
+    # Same method names as DataSet, but memory stays bounded
+    dataset = SketchDataSet()
+    for value in stream:
+        dataset.include(value)
+
+    print(dataset.median(), dataset.quantile(0.99), dataset.mode())
+    print(dataset.distinct_count())
+
+    # Sketches built on different shards combine with join()
+    dataset.join(other_shard)
+
+Error bounds (with the default parameters):
+    quantile/median/window: KLL sketch with k=200. The rank of the returned
+        value is within about 1.7/k * n (under 1% of n) of the requested
+        rank with high probability, using O(k log(n/k)) memory.
+    distinct_count: HyperLogLog with 2**14 registers (16KB). Standard error
+        is 1.04 / sqrt(2**14), about 0.8%.
+    mode: Count-Min sketch (width 2048, depth 4) plus top-k candidates.
+        Frequencies are overestimated by at most e/2048 * n (0.13% of n)
+        with probability 1 - e**-4 (98%), so the mode is exact whenever the
+        most frequent value leads the next one by more than that margin.
+    sum/mean/variance/min/max: exact, from dataset.RunningStats.
+"""
+
+import math
+import random
+import struct
+from array import array
+
+from dataset import RunningStats
+
+MASK64 = (1 << 64) - 1
+
+def _mix64(value):
+    """splitmix64 finaliser: spreads a 64-bit integer over all 64 bits."""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+def _hash64(value):
+    """64-bit hash of a number; equal numbers (1 == 1.0, 0.0 == -0.0) hash equally."""
+    value = float(value) or 0.0
+    return _mix64(struct.unpack('<Q', struct.pack('<d', value))[0])
+
+class KllSketch:
+    """KLL quantile sketch (Karnin, Lang and Liberty, 2016).
+
+    Values are kept in a hierarchy of compactors; compactor h holds values
+    of weight 2**h. When a compactor fills up it is sorted and every other
+    value (with a random offset) is promoted to the next level. Capacities
+    shrink geometrically by 2/3 towards the lower levels, so the sketch
+    holds O(k log(n/k)) values and rank queries are accurate to about
+    1.7/k * n with high probability.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self._compactors = [[]]
+        self._size = 0
+        self._rng = random.Random(seed)
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        depth = len(self._compactors) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _grow(self):
+        self._compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self._compactors)))
+
+    @property
+    def size(self):
+        """Number of values currently held by the sketch."""
+        return self._size
+
+    def add(self, value):
+        """Add a single value."""
+        self._compactors[0].append(value)
+        self._size += 1
+        self.count += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def add_many(self, values):
+        """Add a sequence of values, one capacity-sized slice at a time."""
+        start = 0
+        while start < len(values):
+            step = max(self._max_size - self._size, 1)
+            batch = values[start:start + step]
+            self._compactors[0].extend(batch)
+            self._size += len(batch)
+            self.count += len(batch)
+            start += step
+            while self._size >= self._max_size:
+                self._compress()
+
+    def _compress(self):
+        for level in range(len(self._compactors)):
+            compactor = self._compactors[level]
+            if len(compactor) < self._capacity(level):
+                continue
+            if level + 1 == len(self._compactors):
+                self._grow()
+            compactor.sort()
+            # An odd value out stays behind at this level
+            leftover = [compactor.pop()] if len(compactor) % 2 else []
+            offset = self._rng.random() < 0.5
+            self._compactors[level + 1].extend(compactor[offset::2])
+            self._compactors[level] = leftover
+            self._size = sum(len(c) for c in self._compactors)
+            if self._size < self._max_size:
+                break
+
+    def merge(self, other):
+        """Fold another KllSketch into this one."""
+        while len(self._compactors) < len(other._compactors):
+            self._grow()
+        for level, compactor in enumerate(other._compactors):
+            self._compactors[level].extend(compactor)
+        self.count += other.count
+        self._size = sum(len(c) for c in self._compactors)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def rank(self, value, inclusive=True):
+        """Estimated number of values <= value (< value if not inclusive)."""
+        total = 0
+        for level, compactor in enumerate(self._compactors):
+            if inclusive:
+                total += sum(1 for item in compactor if item <= value) << level
+            else:
+                total += sum(1 for item in compactor if item < value) << level
+        return total
+
+    def _weighted(self):
+        items = [(item, 1 << level)
+                 for level, compactor in enumerate(self._compactors)
+                 for item in compactor]
+        items.sort()
+        return items
+
+    def quantile(self, q):
+        """Estimated q-th quantile, 0 <= q <= 1, or 0 if the sketch is empty."""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if self._size == 0:
+            return 0
+        items = self._weighted()
+        total = sum(weight for _, weight in items)
+        target = q * total
+        cumulative = 0
+        for item, weight in items:
+            cumulative += weight
+            if cumulative >= target:
+                return item
+        return items[-1][0]
+
+class HyperLogLog:
+    """HyperLogLog distinct counter (Flajolet et al., 2007).
+
+    Uses 2**precision one-byte registers; the standard error of the estimate
+    is 1.04 / sqrt(2**precision). Merging takes the register-wise maximum.
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, value):
+        """Add a single value."""
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rho = (64 - self.precision) - remaining.bit_length() + 1
+        if rho > self._registers[index]:
+            self._registers[index] = rho
+
+    def merge(self, other):
+        """Fold another HyperLogLog of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def count(self):
+        """Estimated number of distinct values added."""
+        registers = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / registers)
+        estimate = alpha * registers * registers / math.fsum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * registers and zeros:
+            # Small range correction: linear counting
+            estimate = registers * math.log(registers / zeros)
+        return int(round(estimate))
+
+class CountMinSketch:
+    """Count-Min frequency sketch (Cormode and Muthukrishnan, 2005).
+
+    Estimates never undercount; they overcount by at most e/width * n with
+    probability 1 - e**-depth. Sketches of the same shape merge by adding
+    their tables.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self._rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+
+    def _columns(self, value):
+        hashed = _hash64(value)
+        first, second = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, value, count=1):
+        """Count value, returning its new estimated frequency."""
+        estimate = None
+        for row, column in zip(self._rows, self._columns(value)):
+            row[column] += count
+            if estimate is None or row[column] < estimate:
+                estimate = row[column]
+        return estimate
+
+    def estimate(self, value):
+        """Estimated frequency of value."""
+        return min(row[column] for row, column in zip(self._rows, self._columns(value)))
+
+    def merge(self, other):
+        """Fold another CountMinSketch of the same shape into this one."""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different shape")
+        for row, other_row in zip(self._rows, other._rows):
+            for column, count in enumerate(other_row):
+                if count:
+                    row[column] += count
+
+class SketchDataSet:
+    """DataSet variant that summarises values with sketches instead of storing them.
+
+    Offers the DataSet methods (include, include_many, join, sum, mean,
+    median, mode, min, max, range, window, quantile, percentile, variance,
+    stddev) plus distinct_count(). Order statistics and mode are
+    approximate (see the module docstring for error bounds); sum, mean,
+    variance, min and max are exact. Memory does not grow with the number
+    of values, and two SketchDataSets built with the same parameters can
+    be joined.
+    """
+
+    def __init__(self, k=200, precision=14, width=2048, depth=4, top_k=64, seed=None):
+        self._stats = RunningStats()
+        self._quantiles = KllSketch(k, seed)
+        self._distinct = HyperLogLog(precision)
+        self._frequency = CountMinSketch(width, depth)
+        self._top_k = top_k
+        self._top = {}
+        self._top_floor = 0
+
+    def include(self, data_point):
+        if not isinstance(data_point, (int, float)):
+            raise TypeError("Data point must be a number")
+        float(data_point)  # Raises OverflowError before any sketch is updated
+        self._stats.add(data_point)
+        self._quantiles.add(data_point)
+        self._distinct.add(data_point)
+        self._track(data_point, self._frequency.add(data_point))
+
+    def include_many(self, data_points):
+        """Add a batch of values; the whole batch is validated first, so a
+        TypeError (or an OverflowError for an int too large for a float)
+        leaves the sketches unchanged."""
+        values = list(data_points)
+        if not all(isinstance(value, (int, float)) for value in values):
+            raise TypeError("Data point must be a number")
+        array('d', values)  # Raises OverflowError before any sketch is updated
+        self._stats.add_many(values)
+        self._quantiles.add_many(values)
+        for value in values:
+            self._distinct.add(value)
+            self._track(value, self._frequency.add(value))
+
+    def _track(self, value, estimate):
+        # Keep the top_k values by estimated frequency as mode candidates
+        if value in self._top or len(self._top) < self._top_k:
+            self._top[value] = estimate
+        elif estimate > self._top_floor:
+            del self._top[min(self._top, key=self._top.get)]
+            self._top[value] = estimate
+        else:
+            return
+        if len(self._top) == self._top_k:
+            self._top_floor = min(self._top.values())
+
+    def join(self, other_set):
+        self._stats.merge(other_set._stats)
+        self._quantiles.merge(other_set._quantiles)
+        self._distinct.merge(other_set._distinct)
+        self._frequency.merge(other_set._frequency)
+        candidates = set(self._top) | set(other_set._top)
+        self._top = {}
+        self._top_floor = 0
+        ranked = sorted(candidates, key=self._frequency.estimate, reverse=True)
+        for value in ranked[:self._top_k]:
+            self._track(value, self._frequency.estimate(value))
+
+    def sum(self):
+        """Returns the exact sum, or 0 if the dataset is empty."""
+        return self._stats.sum()
+
+    def mean(self):
+        """Returns the exact mean, or 0 if the dataset is empty."""
+        return self._stats.mean()
+
+    def variance(self):
+        """Returns the exact population variance, or 0 if the dataset is empty."""
+        return self._stats.variance()
+
+    def stddev(self):
+        """Returns the exact population standard deviation, or 0 if empty."""
+        return math.sqrt(self._stats.variance())
+
+    def min(self):
+        """Returns the exact minimum, or 0 if the dataset is empty."""
+        return self._stats.min()
+
+    def max(self):
+        """Returns the exact maximum, or 0 if the dataset is empty."""
+        return self._stats.max()
+
+    def range(self):
+        """Returns the exact (min, max), or (0, 0) if the dataset is empty."""
+        return (self._stats.min(), self._stats.max())
+
+    def quantile(self, q):
+        """Returns the approximate q-th quantile, or 0 if the dataset is empty."""
+        return self._quantiles.quantile(q)
+
+    def percentile(self, p):
+        """Returns the approximate p-th percentile, or 0 if the dataset is empty."""
+        if not 0 <= p <= 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        return self._quantiles.quantile(p / 100)
+
+    def median(self):
+        """Returns the approximate median, or 0 if the dataset is empty."""
+        return self._quantiles.quantile(0.5)
+
+    def window(self, lower_bound, upper_bound):
+        """Returns the approximate count of values within the bounds (inclusive)."""
+        count = (self._quantiles.rank(upper_bound)
+                 - self._quantiles.rank(lower_bound, inclusive=False))
+        return max(count, 0)
+
+    def mode(self):
+        """Returns the approximate mode(s), following DataSet.mode() conventions:
+        an empty list if empty, the smallest value if every value appears to
+        be unique, a single value for one mode and a list for several."""
+        if self._stats.count == 0:
+            return []
+        top_count = max(self._top.values())
+        if top_count == 1:
+            return self._stats.min()
+        modes = [value for value, count in self._top.items() if count == top_count]
+        if len(modes) == 1:
+            return modes[0]
+        return modes
+
+    def distinct_count(self):
+        """Returns the approximate number of distinct values."""
+        return self._distinct.count()
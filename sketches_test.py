@@ -0,0 +1,126 @@
+import pytest
+import random
+from bisect import bisect_left
+from dataset import DataSet
+from sketches import CountMinSketch, HyperLogLog, KllSketch, SketchDataSet
+
+@pytest.fixture
+def values():
+    """100,000 normally distributed values"""
+    rng = random.Random(42)
+    return [rng.gauss(0, 1) for _ in range(100000)]
+
+def rank_error(sorted_values, estimate, q):
+    """Distance between the rank of estimate and the requested rank, as a fraction of n"""
+    return abs(bisect_left(sorted_values, estimate) / len(sorted_values) - q)
+
+def test_quantiles_within_error_bound(values):
+    """Test KLL quantiles against exact ranks (bound ~1.7/k = 0.85%)"""
+    sketch = SketchDataSet(seed=1)
+    sketch.include_many(values)
+    exact = sorted(values)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert rank_error(exact, sketch.quantile(q), q) < 0.02
+    assert rank_error(exact, sketch.median(), 0.5) < 0.02
+
+def test_quantile_memory_is_bounded(values):
+    """Test the sketch keeps a small, bounded sample of the values"""
+    sketch = KllSketch(k=200, seed=1)
+    sketch.add_many(values)
+    assert sketch.count == len(values)
+    assert sketch.size < 1000
+
+def test_join_merges_sketches(values):
+    """Test sketches built on separate shards combine through join()"""
+    first = SketchDataSet(seed=1)
+    first.include_many(values[:50000])
+    second = SketchDataSet(seed=2)
+    for value in values[50000:]:
+        second.include(value)
+    first.join(second)
+    exact = DataSet()
+    exact.include_many(values)
+    assert first.sum() == pytest.approx(exact.sum())
+    assert first.range() == exact.range()
+    assert first.variance() == pytest.approx(exact.variance())
+    assert rank_error(sorted(values), first.median(), 0.5) < 0.02
+    assert first.window(-1, 1) == pytest.approx(exact.window(-1, 1), rel=0.05)
+
+def test_distinct_count_within_error_bound():
+    """Test HyperLogLog against the exact distinct count (standard error 0.8%)"""
+    sketch = HyperLogLog()
+    other = HyperLogLog()
+    for value in range(30000):
+        sketch.add(value)
+        other.add(value + 20000.0)  # Overlaps 10,000 values, as floats
+    sketch.merge(other)
+    assert sketch.count() == pytest.approx(50000, rel=0.04)
+
+def test_distinct_count_small_sets():
+    """Test small cardinalities use the exact-ish linear counting range"""
+    dataset = SketchDataSet()
+    dataset.include_many([1, 1.0, 2, 3, 3, 3, -0.0, 0])
+    assert dataset.distinct_count() == 4
+
+def test_count_min_never_undercounts():
+    """Test Count-Min estimates are upper bounds within e/width * n"""
+    rng = random.Random(7)
+    sketch = CountMinSketch(width=256, depth=4)
+    counts = {}
+    for _ in range(20000):
+        value = rng.randint(0, 2000)
+        counts[value] = counts.get(value, 0) + 1
+        sketch.add(value)
+    for value, count in counts.items():
+        assert count <= sketch.estimate(value) <= count + 2.72 / 256 * 20000 * 2
+
+def test_mode_matches_exact_mode():
+    """Test the heavy hitter is found in a skewed stream"""
+    rng = random.Random(3)
+    values = [rng.randint(0, 5000) for _ in range(50000)] + [77] * 300
+    rng.shuffle(values)
+    sketch = SketchDataSet()
+    sketch.include_many(values)
+    exact = DataSet()
+    exact.include_many(values)
+    assert sketch.mode() == exact.mode() == 77
+
+def test_mode_conventions():
+    """Test empty and all-unique conventions match DataSet.mode()"""
+    dataset = SketchDataSet()
+    assert dataset.mode() == []
+    dataset.include_many([3, 1, 2])
+    assert dataset.mode() == 1
+    dataset.include_many([2, 3])
+    assert sorted(dataset.mode()) == [2, 3]
+
+def test_empty_sketch_dataset():
+    """Test empty results follow DataSet conventions"""
+    dataset = SketchDataSet()
+    assert dataset.sum() == 0
+    assert dataset.mean() == 0
+    assert dataset.median() == 0
+    assert dataset.range() == (0, 0)
+    assert dataset.window(0, 10) == 0
+
+def test_include_invalid_type():
+    """Test non-numbers are rejected"""
+    dataset = SketchDataSet()
+    with pytest.raises(TypeError):
+        dataset.include("not a number")
+    with pytest.raises(TypeError):
+        dataset.include_many([1, "not a number"])
+    assert dataset.sum() == 0
+
+def test_include_int_too_large_for_float():
+    """Test an int beyond the float range leaves every sketch unchanged"""
+    dataset = SketchDataSet()
+    dataset.include(3)
+    with pytest.raises(OverflowError):
+        dataset.include(10 ** 400)
+    with pytest.raises(OverflowError):
+        dataset.include_many([1, 10 ** 400])
+    assert dataset._stats.count == 1
+    assert dataset._quantiles.count == 1
+    assert dataset.distinct_count() == 1
+    assert dataset.mode() == 3